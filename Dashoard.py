@@ -4,8 +4,14 @@ import matplotlib.pyplot as plt
 from streamlit_autorefresh import st_autorefresh
 from datetime import datetime, timedelta, timezone
 import os
+import sys
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "BackTesting"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "Storage"))
+from metrics import compute_metrics
+import sqlite_store
+
 # Set config at the top (fixes Streamlit error)
 st.set_page_config(layout="wide")
 
@@ -27,17 +33,17 @@ if st.sidebar.button("Toggle Mobile View", on_click=toggle_mobile_view):
 st.sidebar.write("Current view: " + ("Mobile" if is_mobile() else "Desktop"))
 
 # Paths
-DATA_PATH = "data/Database.csv"
+DATA_PATH = "data/DataBase.sqlite"
 st_autorefresh(interval=1000 * 60 * 60, key="refresh_dashboard")
 
-# Load CSV safely
+# Open the store safely (written by src/Trading_Bot/DataBase.py)
 if not os.path.exists(DATA_PATH):
-    st.error("❌ Database.csv not found in data/ directory.")
+    st.error("❌ DataBase.sqlite not found in data/ directory.")
     st.stop()
 
-# Load Data
+# Rows are fetched below with indexed source/position/date queries
 try:
-    df = pd.read_csv(DATA_PATH, parse_dates=["timestamp"], decimal=",")
+    con = sqlite_store.connect(DATA_PATH)
 except Exception as e:
     st.error(f"❌ Error loading data: {e}")
     st.stop()
@@ -49,19 +55,16 @@ if mobile_device:
     st.warning("You're viewing the simplified mobile version. For the full experience, please use a desktop browser.")
     
     # Show basic KPIs and latest data
-    if not df.empty:
-        df_live = df[df["source"] == "live"]
+    if sqlite_store.count_rows(con) > 0:
+        df_live = sqlite_store.query(con, source="live")
         if not df_live.empty:
-            initial_balance = df_live["btc_balance"].iloc[0]
-            final_balance = df_live["btc_balance"].iloc[-1]
-            total_days = (df_live["timestamp"].max() - df_live["timestamp"].min()).days or 1
-            apy = ((final_balance / initial_balance) ** (365 / total_days) - 1) * 100
+            live_metrics = compute_metrics(df_live)
             
-            st.metric("APY %", f"{apy:.2f}%")
-            st.metric("BTC Balance", f"{final_balance:.4f}")
+            st.metric("APY %", f"{live_metrics['apy_pct']:.2f}%")
+            st.metric("BTC Balance", f"{live_metrics['final_balance']:.4f}")
             
             # Show latest funding rate
-            latest = df_live.sort_values("timestamp", ascending=False).iloc[0]
+            latest = df_live.iloc[-1]
             st.metric("Latest Funding Rate", f"{latest['fundingRate']:.8f}")
             st.metric("Latest BTC Price", f"${latest['price']:.2f}")
             
@@ -72,7 +75,7 @@ if mobile_device:
             
             # Last 5 rows in table format
             st.subheader("Recent Funding Rates")
-            recent_data = df_live.sort_values("timestamp", ascending=False).head(5)
+            recent_data = sqlite_store.query(con, source="live", latest=5).iloc[::-1]
             st.dataframe(recent_data[["timestamp", "fundingRate", "price"]])
     else:
         st.error("No data available")
@@ -110,41 +113,39 @@ if source_filter == "live":
 st.title("📈 Arbitrage Bot Dashboard")
 st.markdown("Live and backtest performance tracking with trade insights.")
 
-# Sort and clean
-df = df.sort_values("timestamp")
-
-# Apply filters to show filtered data in charts/tables
-df_filtered = df[df["source"] == source_filter]
+# Filters run as indexed queries (rows come back in time order)
+filters = {"source": source_filter}
 if direction_filter != "All":
-    df_filtered = df_filtered[df_filtered["position"] == direction_filter]
+    filters["position"] = direction_filter
 
 # Apply date filter for live data
 if source_filter == "live" and show_date_range:
-    df_filtered = df_filtered[(df_filtered["timestamp"] >= start_datetime) & 
-                             (df_filtered["timestamp"] <= end_datetime)]
+    filters["start"] = start_datetime
+    filters["end"] = end_datetime
+
+df_filtered = sqlite_store.query(con, **filters)
 
 if df_filtered.empty:
     st.warning("No data available for selected filters.")
     st.stop()
 
 # Calculate metrics based on the full dataset, not just the filtered view
-if not df[df["source"] == source_filter].empty:
-    df_metrics = df[df["source"] == source_filter]
-    initial_balance = df_metrics["btc_balance"].iloc[0]
-    final_balance = df_metrics["btc_balance"].iloc[-1]
-    total_days = (df_metrics["timestamp"].max() - df_metrics["timestamp"].min()).days or 1
-    apy = ((final_balance / initial_balance) ** (365 / total_days) - 1) * 100
+df_source = sqlite_store.query(con, source=source_filter)
+if not df_source.empty:
+    metrics = compute_metrics(df_source)
 else:
-    initial_balance = 0
-    final_balance = 0
-    apy = 0
+    metrics = {"initial_balance": 0, "final_balance": 0, "apy_pct": 0, "max_drawdown_pct": 0,
+               "sharpe": float("nan"), "time_in_market_pct": 0}
 
 # KPIs
 col1, col2, col3, col4 = st.columns(4)
-col1.metric("Initial BTC", round(initial_balance, 4))
-col2.metric("Final BTC", round(final_balance, 4))
-col3.metric("# Trades", df_filtered["trade_id"].nunique())
-col4.metric("APY %", f"{apy:.2f}%")
+col1.metric("Initial BTC", round(metrics["initial_balance"], 4))
+col2.metric("Final BTC", round(metrics["final_balance"], 4))
+col3.metric("# Trades", sqlite_store.count_trades(con, **filters))
+col4.metric("APY %", f"{metrics['apy_pct']:.2f}%")
+col1.metric("Max Drawdown %", f"{metrics['max_drawdown_pct']:.2f}%")
+col2.metric("Sharpe", f"{metrics['sharpe']:.2f}")
+col3.metric("Time in Market %", f"{metrics['time_in_market_pct']:.1f}%")
 
 # Charts
 st.markdown("---")
@@ -4,6 +4,12 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta, timezone
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "BackTesting"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "Storage"))
+from metrics import compute_metrics
+import sqlite_store
 
 # Use minimal configuration to ensure compatibility
 st.set_page_config(
@@ -17,43 +23,44 @@ st.title("📈 Arb Bot Dashboard")
 st.markdown("BTC/USDT Funding Rate Analysis")
 
 # Path to data
-DATA_PATH = "data/Database.csv"
+DATA_PATH = "data/DataBase.sqlite"
 
-# Load CSV safely
+# Open the store safely (written by src/Trading_Bot/DataBase.py)
 if not os.path.exists(DATA_PATH):
-    st.error("❌ Database.csv not found in data/ directory.")
+    st.error("❌ DataBase.sqlite not found in data/ directory.")
     st.stop()
 
-# Load Data
 try:
-    df = pd.read_csv(DATA_PATH, parse_dates=["timestamp"], decimal=",")
-    # Ensure timestamp has timezone info
-    if df["timestamp"].dt.tz is None:
-        df["timestamp"] = df["timestamp"].dt.tz_localize("UTC")
+    con = sqlite_store.connect(DATA_PATH)
 except Exception as e:
     st.error(f"❌ Error loading data: {e}")
     st.stop()
 
+
+def load_rows(**filters):
+    # Indexed query; timestamps get timezone info
+    rows = sqlite_store.query(con, **filters)
+    rows["timestamp"] = rows["timestamp"].dt.tz_localize("UTC")
+    return rows
+
+
 # Add data source selector
 data_source = st.radio("Select Data Source:", ["Live", "Backtest"], horizontal=True)
 
-# Filter based on selected data source
-if data_source == "Live":
-    filtered_df = df[df["source"] == "live"]
-    source_label = "live"
-else:
-    filtered_df = df[df["source"] == "backtest"]
-    source_label = "backtest"
+# Query the selected data source
+source_label = "live" if data_source == "Live" else "backtest"
+filtered_df = load_rows(source=source_label)
 
 if filtered_df.empty:
     st.warning(f"No {source_label} data available.")
     st.stop()
 
 # Calculate key metrics
-initial_balance = filtered_df["btc_balance"].iloc[0]
-final_balance = filtered_df["btc_balance"].iloc[-1]
-total_days = (filtered_df["timestamp"].max() - filtered_df["timestamp"].min()).days or 1
-apy = ((final_balance / initial_balance) ** (365 / total_days) - 1) * 100
+metrics = compute_metrics(filtered_df)
+initial_balance = metrics["initial_balance"]
+final_balance = metrics["final_balance"]
+total_days = metrics["days"] or 1
+apy = metrics["apy_pct"]
 
 # Basic stats
 st.header("Key Metrics")
@@ -62,6 +69,8 @@ col1.metric("Initial BTC", f"{initial_balance:.4f}")
 col2.metric("Current BTC", f"{final_balance:.4f}")
 col1.metric("APY %", f"{apy:.2f}%")
 col2.metric("Time Period", f"{total_days} days")
+col1.metric("Max Drawdown %", f"{metrics['max_drawdown_pct']:.2f}%")
+col2.metric("Time in Market %", f"{metrics['time_in_market_pct']:.1f}%")
 
 # Display current UTC time
 now_utc = datetime.now(tz=timezone.utc)
@@ -118,11 +127,11 @@ selected_time = st.selectbox("Select time period:", time_options)
 # Filter data based on selected time period
 now_utc_pd = pd.Timestamp(now_utc)  # Convert to pandas timestamp with timezone
 if selected_time == "Last 24 hours":
-    chart_data = filtered_df[filtered_df["timestamp"] >= now_utc_pd - pd.Timedelta(days=1)]
+    chart_data = load_rows(source=source_label, start=now_utc_pd - pd.Timedelta(days=1))
 elif selected_time == "Last 7 days":
-    chart_data = filtered_df[filtered_df["timestamp"] >= now_utc_pd - pd.Timedelta(days=7)]
+    chart_data = load_rows(source=source_label, start=now_utc_pd - pd.Timedelta(days=7))
 elif selected_time == "Last 30 days":
-    chart_data = filtered_df[filtered_df["timestamp"] >= now_utc_pd - pd.Timedelta(days=30)]
+    chart_data = load_rows(source=source_label, start=now_utc_pd - pd.Timedelta(days=30))
 else:  # All time
     chart_data = filtered_df
 
@@ -175,7 +184,7 @@ if not chart_data.empty:
 
 # Recent data table
 st.header(f"Latest {source_label.capitalize()} Funding Rates")
-latest_data = filtered_df.sort_values("timestamp", ascending=False).head(5)
+latest_data = load_rows(source=source_label, latest=5).iloc[::-1]
 latest_data = latest_data[["timestamp", "fundingRate", "price", "profit"]]
 latest_data.columns = ["Time (UTC)", "Funding Rate", "BTC Price", "Profit"]
 st.dataframe(latest_data, use_container_width=True)
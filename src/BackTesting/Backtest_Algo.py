@@ -1,30 +1,89 @@
 import pandas as pd
+import numpy as np
 import os
+import json
 import config
 from datetime import timedelta
+from strategy_config import StrategyConfig
+from funding_data import read_funding_csv, align_venues
+from columnar import save_frame
+from integrity import warn_if_unclean
+from metrics import apy_pct, period_days
 
 class FundingArbitrageBacktest:
-    def __init__(self, csv_file, asset_name=config.asset_name, btc_position=config.btc_position, maker_fee_rate=config.position_fee, compound=config.use_compounding):
+    def __init__(self, csv_file, asset_name=None, btc_position=None, maker_fee_rate=None, compound=None, engine=None, strategy=None):
+        # Settings come from an immutable StrategyConfig; config.py is only the default source.
+        # Explicit keyword arguments still override the matching strategy fields.
+        if strategy is None:
+            strategy = StrategyConfig.from_module(config)
+        overrides = {
+            "asset_name": asset_name,
+            "btc_position": btc_position,
+            "position_fee": maker_fee_rate,
+            "use_compounding": compound,
+        }
+        overrides = {k: v for k, v in overrides.items() if v is not None}
+        if overrides:
+            strategy = strategy.with_overrides(**overrides)
+
+        self.strategy = strategy
         self.csv_file = csv_file
-        self.asset_name = asset_name
-        self.btc_position = btc_position
-        self.initial_btc = btc_position
-        self.maker_fee_rate = maker_fee_rate
-        self.compound = compound
+        self.asset_name = strategy.asset_name
+        self.btc_position = strategy.btc_position
+        self.initial_btc = strategy.btc_position
+        self.maker_fee_rate = strategy.position_fee
+        self.compound = strategy.use_compounding
+        self.engine = engine or config.backtest_engine
         self.df = None
         self.results = []
         self.df_results = None
+        self.state = None
+        self.resumed_from = None
 
-    def load_data(self):
-        self.df = pd.read_csv(self.csv_file, decimal=',', parse_dates=["timestamp"])
-        self.df = self.df[self.df["fundingRate"] != 0].sort_values("timestamp")
+    def load_data(self, raw_df=None):
+        # raw_df lets callers that already parsed csv_file (e.g. sweep workers) skip the read
+        if raw_df is None:
+            warn_if_unclean(self.csv_file)
+            raw_df = read_funding_csv(self.csv_file)
+        stamps = raw_df["timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        if (raw_df["fundingRate"] != 0).all() and (np.diff(stamps) > 0).all():
+            # Already sorted with no zero rates: a shallow copy keeps the rate and price columns
+            # shared (a record store's are views of the mapping); added columns stay ours
+            self.df = raw_df.copy(deep=False)
+        else:
+            self.df = raw_df[raw_df["fundingRate"] != 0].sort_values("timestamp")
         self.df["position"] = None
         self.df["fees_paid"] = 0.0
         self.df["profit"] = 0.0
         self.df["trade_id"] = None
         self.df["btc_balance"] = self.btc_position
 
+    def _initial_state(self):
+        return {
+            "position_open": False,
+            "current_direction": None,
+            "cumulative_funding": 0,
+            "funding_income": 0,
+            "rounds": 0,
+            "trade_id": 0,
+            "btc_balance": self.btc_position,
+            "funding_window": [],
+        }
+
     def run_backtest(self):
+        if self.engine == "loop":
+            self._run_backtest_loop()
+        else:
+            self._run_backtest_array(self._initial_state())
+        self._build_results()
+
+    def _build_results(self):
+        self.df_results = pd.DataFrame(self.results)
+        if not self.df_results.empty:
+            self.df_results["cumulative_profit"] = self.df_results["net_profit"].cumsum()
+
+    def _run_backtest_loop(self):
+        strategy = self.strategy
         position_open = False
         current_direction = None
         cumulative_funding = 0
@@ -46,14 +105,10 @@ class FundingArbitrageBacktest:
 
             self.df.loc[i, "btc_balance"] = btc_balance
 
-            entry_fee_threshold = {
-                "entry_only": one_side_fee,
-                "half_round": round_fee * 0.5,
-                "round_trip": round_fee
-            }.get(config.entry_fee_type, round_fee)
+            entry_fee_threshold = one_side_fee * strategy.entry_fee_factor
 
             if step_income >= entry_fee_threshold and not position_open:
-                if config.short_only and direction != "short":
+                if strategy.short_only and direction != "short":
                     continue
 
                 position_open = True
@@ -76,7 +131,7 @@ class FundingArbitrageBacktest:
                 exit_due_to_direction = False
                 exit_due_to_low_funding = False
 
-                if config.use_avg_window:
+                if strategy.use_avg_window:
                     avg_funding = sum(funding_window) / len(funding_window)
                     if (current_direction == "short" and avg_funding < 0) or (current_direction == "long" and avg_funding > 0):
                         exit_due_to_direction = True
@@ -84,7 +139,7 @@ class FundingArbitrageBacktest:
                     if direction != current_direction:
                         exit_due_to_direction = True
 
-                if config.exit_on_low_funding and step_income <= one_side_fee:
+                if strategy.exit_on_low_funding and step_income <= one_side_fee:
                     exit_due_to_low_funding = True
 
                 if exit_due_to_direction or exit_due_to_low_funding:
@@ -116,11 +171,9 @@ class FundingArbitrageBacktest:
                     self.df.loc[i, "trade_id"] = trade_id
                     self.df.loc[i, "profit"] = funding_income - round_fee
 
-            elif config.enable_idle_lending:
+            elif strategy.enable_idle_lending:
                 # Apply passive yield for idle lending
-                daily_yield = (1 + config.idle_lending_apy) ** (1 / 365) - 1
-                period_yield = daily_yield / 3  # Each funding is 8h = 1/3 day
-                passive_profit = btc_balance * period_yield * price  # Yield in USDT
+                passive_profit = btc_balance * strategy.idle_period_yield * price  # Yield in USDT
                 if self.compound:
                     btc_balance += passive_profit / price
                 self.df.loc[i, "position"] = "lending"
@@ -129,20 +182,215 @@ class FundingArbitrageBacktest:
                 self.df.loc[i, "profit"] = passive_profit
                 self.df.loc[i, "btc_balance"] = btc_balance
 
-        self.df_results = pd.DataFrame(self.results)
-        if not self.df_results.empty:
-            self.df_results["cumulative_profit"] = self.df_results["net_profit"].cumsum()
+        self.state = {
+            "position_open": position_open,
+            "current_direction": current_direction,
+            "cumulative_funding": cumulative_funding,
+            "funding_income": funding_income,
+            "rounds": rounds,
+            "trade_id": trade_id,
+            "btc_balance": btc_balance,
+            "funding_window": funding_window,
+        }
+
+    def _run_backtest_array(self, state):
+        # Same state machine as _run_backtest_loop, but reading plain arrays and
+        # writing into preallocated outputs that are assigned to the frame once
+        n = len(self.df)
+        fundings = self.df["fundingRate"].to_numpy(dtype=float).tolist()
+        prices = self.df["price"].to_numpy(dtype=float).tolist()
+
+        positions = np.full(n, None, dtype=object)
+        trade_ids = np.full(n, None, dtype=object)
+        fees_paid = np.zeros(n)
+        profits = np.zeros(n)
+        balances = np.zeros(n)
+
+        position_open = state["position_open"]
+        current_direction = state["current_direction"]
+        cumulative_funding = state["cumulative_funding"]
+        funding_income = state["funding_income"]
+        rounds = state["rounds"]
+        trade_id = state["trade_id"]
+        btc_balance = state["btc_balance"]
+        funding_window = list(state["funding_window"])
+
+        strategy = self.strategy
+        entry_fee_factor = strategy.entry_fee_factor
+        short_only = strategy.short_only
+        use_avg_window = strategy.use_avg_window
+        exit_on_low_funding = strategy.exit_on_low_funding
+        enable_idle_lending = strategy.enable_idle_lending
+        period_yield = strategy.idle_period_yield
+
+        for k in range(n):
+            funding = fundings[k]
+            price = prices[k]
+            position_size_usdt = btc_balance * price
+            one_side_fee = position_size_usdt * self.maker_fee_rate
+            round_fee = one_side_fee * 2
+            direction = "long" if funding < 0 else "short"
+            step_income = abs(funding) * position_size_usdt
+
+            balances[k] = btc_balance
+
+            entry_fee_threshold = one_side_fee * entry_fee_factor
+
+            if step_income >= entry_fee_threshold and not position_open:
+                if short_only and direction != "short":
+                    continue
+
+                position_open = True
+                current_direction = direction
+                cumulative_funding = funding
+                funding_income = step_income
+                rounds = 1
+                funding_window = [funding]
+
+                positions[k] = direction
+                trade_ids[k] = trade_id
+                fees_paid[k] = one_side_fee
+                profits[k] = funding_income - round_fee
+
+            elif position_open:
+                funding_window.append(funding)
+                if len(funding_window) > 3:
+                    funding_window.pop(0)
+
+                if use_avg_window:
+                    avg_funding = sum(funding_window) / len(funding_window)
+                    exit_due_to_direction = (current_direction == "short" and avg_funding < 0) or (current_direction == "long" and avg_funding > 0)
+                else:
+                    exit_due_to_direction = direction != current_direction
+
+                exit_due_to_low_funding = exit_on_low_funding and step_income <= one_side_fee
+
+                if exit_due_to_direction or exit_due_to_low_funding:
+                    funding_income += step_income
+                    cumulative_funding += funding
+                    net_profit = funding_income - round_fee
+                    self.results.append({
+                        "start": self.df["timestamp"].iat[k],
+                        "direction": current_direction,
+                        "funding_total": cumulative_funding,
+                        "funding_income": funding_income,
+                        "fees": round_fee,
+                        "net_profit": net_profit,
+                        "rounds": rounds
+                    })
+                    fees_paid[k] = one_side_fee
+                    profits[k] = net_profit
+                    trade_ids[k] = trade_id
+                    if self.compound:
+                        btc_balance += net_profit / price
+                    trade_id += 1
+                    position_open = False
+                    current_direction = None
+                else:
+                    cumulative_funding += funding
+                    funding_income += step_income
+                    rounds += 1
+                    positions[k] = current_direction
+                    trade_ids[k] = trade_id
+                    profits[k] = funding_income - round_fee
+
+            elif enable_idle_lending:
+                passive_profit = btc_balance * period_yield * price  # Yield in USDT
+                if self.compound:
+                    btc_balance += passive_profit / price
+                positions[k] = "lending"
+                profits[k] = passive_profit
+                balances[k] = btc_balance
+
+        self.df["position"] = positions
+        self.df["fees_paid"] = fees_paid
+        self.df["profit"] = profits
+        self.df["trade_id"] = trade_ids
+        # The loop engine keeps an integer balance column until a fractional value is written
+        if self.df["btc_balance"].dtype.kind == "i" and np.all(balances == np.floor(balances)):
+            balances = balances.astype(self.df["btc_balance"].dtype)
+        self.df["btc_balance"] = balances
+
+        self.state = {
+            "position_open": position_open,
+            "current_direction": current_direction,
+            "cumulative_funding": cumulative_funding,
+            "funding_income": funding_income,
+            "rounds": rounds,
+            "trade_id": trade_id,
+            "btc_balance": btc_balance,
+            "funding_window": funding_window,
+        }
+
+    # === Checkpoint / resume ===
+    # A checkpoint holds the end-of-run state machine plus the closed trades, so a later
+    # run can pick up at the first funding row after last_timestamp instead of replaying history.
+    def save_checkpoint(self, checkpoint_path):
+        if self.df.empty and self.resumed_from is not None:
+            last = self.resumed_from
+            last_timestamp = last["last_timestamp"]
+            last_row = {"fundingRate": last["last_funding_rate"], "price": last["last_price"], "btc_balance": last["last_row_balance"]}
+        else:
+            last_timestamp = self.df["timestamp"].iloc[-1].isoformat()
+            last_row = self.df.iloc[-1]
+
+        first_timestamp = self.resumed_from["first_timestamp"] if self.resumed_from else self.df["timestamp"].iloc[0].isoformat()
+        checkpoint = {
+            "version": 1,
+            "strategy": self.strategy.as_dict(),
+            "first_timestamp": first_timestamp,
+            "last_timestamp": last_timestamp,
+            "last_funding_rate": float(last_row["fundingRate"]),
+            "last_price": float(last_row["price"]),
+            "last_row_balance": last_row["btc_balance"].item() if hasattr(last_row["btc_balance"], "item") else last_row["btc_balance"],
+            "state": self.state,
+            "results": [{**r, "start": pd.Timestamp(r["start"]).isoformat()} for r in self.results],
+        }
+
+        os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+        tmp_path = checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, checkpoint_path)
+
+    def resume_backtest(self, checkpoint_path):
+        # Call after load_data(): only rows newer than the checkpoint are processed, and
+        # self.df is trimmed to those rows so export_modified_csv(append=True) adds just them.
+        with open(checkpoint_path) as f:
+            checkpoint = json.load(f)
+
+        if checkpoint["strategy"] != self.strategy.as_dict():
+            raise ValueError(f"Checkpoint {checkpoint_path} was made with a different strategy config; run a full backtest")
+
+        last_timestamp = pd.Timestamp(checkpoint["last_timestamp"])
+        anchor = self.df[self.df["timestamp"] == last_timestamp]
+        if anchor.empty or anchor["fundingRate"].iloc[-1] != checkpoint["last_funding_rate"] or anchor["price"].iloc[-1] != checkpoint["last_price"]:
+            raise ValueError(f"Funding history no longer matches checkpoint {checkpoint_path}; run a full backtest")
+
+        self.df = self.df[self.df["timestamp"] > last_timestamp].copy()
+        self.results = [{**r, "start": pd.Timestamp(r["start"])} for r in checkpoint["results"]]
+        self.resumed_from = checkpoint
+        self._run_backtest_array(checkpoint["state"])
+        self._build_results()
 
     def summary(self):
         if self.df_results is None or self.df_results.empty:
             return f"No profitable trades detected for {self.asset_name}."
 
         total_net = self.df_results["net_profit"].sum()
-        days = (self.df["timestamp"].max() - self.df["timestamp"].min()).days
+        first_ts = self.df["timestamp"].min()
+        last_ts = self.df["timestamp"].max()
+        final_btc = self.df["btc_balance"].iloc[-1] if not self.df.empty else None
+        if self.resumed_from is not None:
+            # Resumed runs only hold the new rows; the checkpoint covers everything before them
+            first_ts = pd.Timestamp(self.resumed_from["first_timestamp"])
+            if self.df.empty:
+                last_ts = pd.Timestamp(self.resumed_from["last_timestamp"])
+                final_btc = self.resumed_from["last_row_balance"]
+        days = (last_ts - first_ts).days
         start_btc = self.initial_btc
-        final_btc = self.df["btc_balance"].iloc[-1]
 
-        apy_btc = ((final_btc / start_btc) ** (365 / days) - 1) * 100
+        apy_btc = apy_pct(start_btc, final_btc, days)
 
         print(f"[ {self.asset_name} ] Initial {self.asset_name}: {start_btc}, Final {self.asset_name}: {final_btc}")
 
@@ -156,6 +404,233 @@ class FundingArbitrageBacktest:
             "Longest streak": int(self.df_results["rounds"].max())
         }
 
+    def export_modified_csv(self, output_path, append=False):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if not append or not os.path.exists(output_path):
+            save_frame(self.df, output_path)
+            return
+
+        # Append only this run's rows, writing timestamps with the precision the file already uses
+        rows = self.df.copy()
+        rows["timestamp"] = _format_timestamps_like(rows["timestamp"], _last_line(output_path))
+        rows.to_csv(output_path, mode="a", header=False, index=False, decimal=',')
+
+
+class FundingSpreadBacktest:
+    # Cross-exchange funding spread on two venues: short the perp where funding is higher and long
+    # it where funding is lower, so price exposure cancels and the position earns the difference.
+    # Shares the entry fee rule, 3-funding average exit, low-funding exit and compounding switches
+    # of FundingArbitrageBacktest; short_only and idle lending don't apply to a two-leg spread.
+    # In the output, position "short" means short on the first venue / long on the second.
+    def __init__(self, venue_files, strategy=None, venue_fees=None, tolerance=pd.Timedelta("1h")):
+        if len(venue_files) != 2:
+            raise ValueError("FundingSpreadBacktest needs exactly two venues")
+        if strategy is None:
+            strategy = StrategyConfig.from_module(config)
+
+        self.venue_files = dict(venue_files)
+        self.venue_a, self.venue_b = list(self.venue_files)
+        self.strategy = strategy
+        self.asset_name = strategy.asset_name
+        self.initial_btc = strategy.btc_position
+        self.venue_fees = venue_fees or {}
+        self.tolerance = tolerance
+        self.df = None
+        self.results = []
+        self.df_results = None
+
+    def load_data(self, aligned=None):
+        # Timestamp-aligned frame with <venue>_fundingRate / <venue>_price columns
+        self.df = aligned if aligned is not None else align_venues(self.venue_files, self.tolerance)
+        self.df = self.df.reset_index(drop=True)
+
+    def _trades(self, carry, one_side_fee, direction, can_enter):
+        # Entry/exit rows for every trade. All per-row conditions are evaluated as arrays, and
+        # "next row >= t where the condition holds" lookups turn the state machine into one jump
+        # per trade instead of one Python step per row.
+        strategy = self.strategy
+        n = len(carry)
+        rows = np.arange(n)
+
+        def next_true(mask):
+            return np.minimum.accumulate(np.where(mask, rows, n)[::-1])[::-1]
+
+        def lookup(next_rows, t):
+            return next_rows[t] if t < n else n
+
+        exit_lookups = {}
+        for o in (1, -1):
+            lookups = []
+            if strategy.use_avg_window:
+                # Window restarts on entry: 2 carries on the first hold row, the last 3 afterwards
+                # Zero-padded in front so the sums keep length n however short the series is
+                padded = np.concatenate([[0.0, 0.0], carry])
+                sum2 = carry + padded[1:-1]
+                sum3 = sum2 + padded[:-2]
+                lookups.append(("first", o * sum2 < 0))
+                lookups.append(("later", next_true(o * sum3 < 0)))
+            else:
+                lookups.append(("any", next_true(direction != o)))
+            if strategy.exit_on_low_funding:
+                lookups.append(("any", next_true(o * carry <= one_side_fee)))
+            exit_lookups[o] = lookups
+
+        next_entry = next_true(can_enter)
+        trades = []
+        t = lookup(next_entry, 0)
+        while t < n:
+            entry, o = t, int(direction[t])
+            exit_row = n
+            for kind, values in exit_lookups[o]:
+                if kind == "first":
+                    if entry + 1 < n and values[entry + 1]:
+                        exit_row = min(exit_row, entry + 1)
+                elif kind == "later":
+                    exit_row = min(exit_row, lookup(values, entry + 2))
+                else:
+                    exit_row = min(exit_row, lookup(values, entry + 1))
+            trades.append((entry, exit_row, o))
+            t = lookup(next_entry, exit_row + 1)
+        return trades
+
+    def run_backtest(self):
+        df = self.df
+        a, b = self.venue_a, self.venue_b
+        strategy = self.strategy
+        n = len(df)
+        f_a = df[f"{a}_fundingRate"].to_numpy(dtype=float)
+        f_b = df[f"{b}_fundingRate"].to_numpy(dtype=float)
+        p_a = df[f"{a}_price"].to_numpy(dtype=float)
+        p_b = df[f"{b}_price"].to_numpy(dtype=float)
+        fee_a = self.venue_fees.get(a, strategy.position_fee)
+        fee_b = self.venue_fees.get(b, strategy.position_fee)
+
+        # Per unit of balance (decisions don't depend on position size):
+        # carry = USDT earned per period by short a / long b, one_side_fee = cost to open or close both legs
+        carry = f_a * p_a - f_b * p_b
+        one_side_fee = fee_a * p_a + fee_b * p_b
+        ref_price = (p_a + p_b) / 2
+        direction = np.where(carry >= 0, 1, -1)
+        can_enter = np.abs(carry) >= one_side_fee * strategy.entry_fee_factor
+
+        trades = self._trades(carry, one_side_fee, direction, can_enter)
+        n_trades = len(trades)
+        entries = np.array([t[0] for t in trades], dtype=np.int64)
+        exits = np.array([t[1] for t in trades], dtype=np.int64)
+        orientation = np.array([t[2] for t in trades], dtype=np.int64)
+        closed = exits < n
+        last_rows = np.minimum(exits, n - 1)
+
+        # Row -> trade index (-1 outside trades), built from entry/exit markers
+        marker = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(marker, entries, 1)
+        np.add.at(marker, last_rows + 1, -1)
+        in_trade = np.cumsum(marker[:n]) > 0
+        trade_of_row = np.where(in_trade, np.cumsum(np.bincount(entries, minlength=n)) - 1, -1)
+
+        # Signed carry earned on every trade row and its running total inside each trade
+        row_orientation = np.where(in_trade, orientation[trade_of_row] if n_trades else 0, 0)
+        income = row_orientation * carry
+        income_cum = np.cumsum(income)
+        income_before = np.concatenate([[0.0], income_cum])[entries]
+        income_to_row = np.where(in_trade, income_cum - (income_before[trade_of_row] if n_trades else 0), 0.0)
+
+        # Per-unit trade results and compounding, closed trades only
+        round_fee_exit = 2 * one_side_fee[last_rows]
+        trade_income = income_cum[last_rows] - income_before
+        net_unit = trade_income - round_fee_exit
+        growth = np.where(closed, 1 + net_unit / ref_price[last_rows], 1.0) if strategy.use_compounding else np.ones(n_trades)
+        balance_levels = strategy.btc_position * np.concatenate([[1.0], np.cumprod(growth)])
+        trade_balance = balance_levels[:-1]
+
+        # Balance recorded on a row = level after every trade closed strictly before it
+        exit_marker = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(exit_marker, exits[closed] + 1, 1)
+        balances = balance_levels[np.cumsum(exit_marker[:n])]
+
+        is_exit_row = np.zeros(n, dtype=bool)
+        is_exit_row[exits[closed]] = True
+        is_entry_row = np.zeros(n, dtype=bool)
+        is_entry_row[entries] = True
+        row_balance = np.where(in_trade, trade_balance[trade_of_row] if n_trades else 0.0, 0.0)
+
+        profit = np.where(in_trade, row_balance * (income_to_row - 2 * one_side_fee), 0.0)
+        fees_paid = np.where(is_entry_row | is_exit_row, row_balance * one_side_fee, 0.0)
+        holding = in_trade & ~is_exit_row
+        position = np.full(n, None, dtype=object)
+        position[holding & (row_orientation == 1)] = "short"
+        position[holding & (row_orientation == -1)] = "long"
+        short_venue = np.full(n, None, dtype=object)
+        short_venue[holding & (row_orientation == 1)] = a
+        short_venue[holding & (row_orientation == -1)] = b
+        trade_id = np.full(n, None, dtype=object)
+        trade_id[in_trade] = trade_of_row[in_trade].tolist()
+
+        self.df = df.assign(
+            spread=f_a - f_b,
+            position=position,
+            short_venue=short_venue,
+            fees_paid=fees_paid,
+            profit=profit,
+            trade_id=trade_id,
+            btc_balance=balances,
+        )
+
+        timestamps = df["timestamp"]
+        spread_cum = np.concatenate([[0.0], np.cumsum(np.where(in_trade, row_orientation * (f_a - f_b), 0.0))])
+        self.results = [
+            {
+                "start": timestamps.iat[e],
+                "end": timestamps.iat[x],
+                "direction": f"short {a} / long {b}" if o == 1 else f"short {b} / long {a}",
+                "funding_total": spread_cum[x + 1] - spread_cum[e],
+                "funding_income": bal * inc,
+                "fees": bal * fee,
+                "net_profit": bal * net,
+                "rounds": int(x - e),
+            }
+            for e, x, o, bal, inc, fee, net, c in zip(entries, last_rows, orientation, trade_balance, trade_income, round_fee_exit, net_unit, closed)
+            if c
+        ]
+        self.df_results = pd.DataFrame(self.results)
+        if not self.df_results.empty:
+            self.df_results["cumulative_profit"] = self.df_results["net_profit"].cumsum()
+
+    def summary(self):
+        if self.df_results is None or self.df_results.empty:
+            return f"No profitable spread trades detected for {self.asset_name} ({self.venue_a}/{self.venue_b})."
+
+        days = period_days(self.df["timestamp"])
+        final_btc = self.df["btc_balance"].iloc[-1]
+        apy_btc = apy_pct(self.initial_btc, final_btc, days)
+
+        return {
+            "Asset": self.asset_name,
+            "Venues": f"{self.venue_a}/{self.venue_b}",
+            "Total net profit (USDT)": round(self.df_results["net_profit"].sum(), 2),
+            rf"APY Estimated ({self.asset_name}-based %)": round(apy_btc, 2),
+            "Number of operations": len(self.df_results),
+            "Most profitable streak (USDT)": round(self.df_results["net_profit"].max(), 2),
+            "Least profitable streak (USDT)": round(self.df_results["net_profit"].min(), 2),
+            "Longest streak": int(self.df_results["rounds"].max())
+        }
+
     def export_modified_csv(self, output_path):
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        self.df.to_csv(output_path, index=False, decimal=',')
+        save_frame(self.df, output_path)
+
+
+def _last_line(path):
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = f.read().splitlines()
+    return lines[-1].decode() if lines else ""
+
+
+def _format_timestamps_like(timestamps, sample_line):
+    sample = sample_line.split(",", 1)[0]
+    if "." not in sample:
+        return timestamps.dt.strftime("%Y-%m-%d %H:%M:%S")
+    digits = len(sample.split(".", 1)[1])
+    return timestamps.dt.strftime("%Y-%m-%d %H:%M:%S.%f").str[:20 + digits]
@@ -0,0 +1,186 @@
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import config
+from Backtest_Algo import FundingArbitrageBacktest
+from strategy_config import StrategyConfig
+from sweep import sweep_grid
+
+# === Benchmark configuration ===
+benchmark_sizes = [10_000, 100_000, 1_000_000, 10_000_000]
+# Every switch that changes the code path; position_fee only scales numbers, so it's pinned
+benchmark_grid = {k: v for k, v in sweep_grid.items() if k != "position_fee"}
+benchmark_engine = "array"
+output_dir = os.path.join("data", "benchmarks")
+# A stage is reported as a regression when it gets this much slower than the baseline
+regression_threshold = 0.20
+# ...and by at least this many seconds, so timer noise on tiny stages isn't flagged
+regression_min_seconds = 0.01
+
+STAGES = ["load", "run", "summary", "export"]
+
+
+def synthetic_funding(n_rows, seed=0, interval_hours=8, start="2019-09-10 08:00:00"):
+    # Funding/price series shaped like the Binance files: regimes of positive or negative funding
+    # around the 0.01% clamp, a share of rows pinned exactly at the clamp, a few zero-funding
+    # rows for load_data to drop, and a geometric random-walk price
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range(start, periods=n_rows, freq=f"{interval_hours}h")
+    timestamps = timestamps + pd.to_timedelta(rng.integers(0, 10, n_rows), unit="ms")
+
+    regime_lengths = rng.geometric(1 / 30, size=n_rows // 10 + 1)
+    levels = rng.normal(0.0001, 0.0003, size=len(regime_lengths))
+    funding = np.repeat(levels, regime_lengths)[:n_rows]
+    if len(funding) < n_rows:
+        funding = np.concatenate([funding, np.full(n_rows - len(funding), 0.0001)])
+    funding = funding + rng.normal(0, 0.00005, n_rows)
+    funding[np.abs(funding - 0.0001) < 0.00005] = 0.0001
+    funding[rng.random(n_rows) < 0.005] = 0.0
+    funding = funding.round(8)
+
+    log_returns = rng.normal(0, 0.02, n_rows)
+    price = 100 * np.exp(np.cumsum(log_returns))
+
+    return pd.DataFrame({"timestamp": timestamps, "fundingRate": funding, "price": price})
+
+
+def write_synthetic_csv(path, n_rows, seed=0):
+    # Same layout as get_Binance_Fundings.py output, so load_data takes its normal path
+    synthetic_funding(n_rows, seed).to_csv(path, index=False, decimal=',', date_format="%Y-%m-%d %H:%M:%S.%f")
+
+
+def benchmark_combination(csv_file, params, engine, export_path):
+    strategy = StrategyConfig.from_module(config, asset_name="SYN", btc_position=5, **params)
+    backtester = FundingArbitrageBacktest(csv_file=csv_file, strategy=strategy, engine=engine)
+    timings = {}
+
+    start = time.perf_counter()
+    backtester.load_data()
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    backtester.run_backtest()
+    timings["run"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        backtester.summary()
+    timings["summary"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    backtester.export_modified_csv(export_path)
+    timings["export"] = time.perf_counter() - start
+
+    return timings, len(backtester.df), len(backtester.df_results)
+
+
+def run_benchmarks(sizes=benchmark_sizes, grid=benchmark_grid, engine=benchmark_engine, repeat=1, seed=0):
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    records = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        export_path = os.path.join(tmp_dir, "export", "backtest.csv")
+        for n_rows in sizes:
+            csv_file = os.path.join(tmp_dir, f"synthetic_{n_rows}.csv")
+            write_synthetic_csv(csv_file, n_rows, seed)
+            for params in combos:
+                # Best of `repeat` runs per stage: the least noisy estimate on a shared machine
+                best = None
+                for _ in range(repeat):
+                    timings, rows, trades = benchmark_combination(csv_file, params, engine, export_path)
+                    best = timings if best is None else {s: min(best[s], timings[s]) for s in STAGES}
+                record = {"rows": n_rows, "engine": engine, **params}
+                record.update({f"{s}_s": round(best[s], 6) for s in STAGES})
+                record.update({"filtered_rows": rows, "trades": trades})
+                records.append(record)
+                print(f"{n_rows:>10} rows {params} " + " ".join(f"{s}={best[s]:.3f}s" for s in STAGES))
+            os.remove(csv_file)
+    return records
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(tz=timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def record_key(record):
+    return tuple((k, record[k]) for k in ["rows", "engine", *benchmark_grid])
+
+
+def compare(records, baseline_records, threshold=regression_threshold, min_seconds=regression_min_seconds):
+    # Stages that got slower than the baseline by more than `threshold` (matching rows + params)
+    baseline = {record_key(r): r for r in baseline_records}
+    regressions = []
+    for record in records:
+        base = baseline.get(record_key(record))
+        if base is None:
+            continue
+        for stage in STAGES:
+            old, new = base[f"{stage}_s"], record[f"{stage}_s"]
+            if old > 0 and new > old * (1 + threshold) and new - old > min_seconds:
+                regressions.append({**dict(record_key(record)), "stage": stage, "baseline_s": old, "current_s": new,
+                                    "slowdown_pct": round((new / old - 1) * 100, 1)})
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time load/run/summary/export of the backtest on synthetic series")
+    parser.add_argument("--sizes", type=int, nargs="+", default=benchmark_sizes, help="Row counts to generate")
+    parser.add_argument("--engine", choices=["array", "loop"], default=benchmark_engine)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per combination (best time is kept)")
+    parser.add_argument("--quick", action="store_true", help="Only the config.py strategy instead of every combination")
+    parser.add_argument("--output", default=None, help="JSON results file (default: data/benchmarks/<commit>.json)")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to check for regressions")
+    args = parser.parse_args()
+
+    grid = benchmark_grid
+    if args.quick:
+        grid = {k: [getattr(config, k)] for k in benchmark_grid}
+
+    records = run_benchmarks(sizes=args.sizes, grid=grid, engine=args.engine, repeat=args.repeat)
+    results = {"environment": environment(), "records": records}
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        results["baseline"] = {"file": args.baseline, "commit": baseline["environment"].get("commit")}
+        results["regressions"] = compare(records, baseline["records"])
+        for r in results["regressions"]:
+            print(f"⚠️ {r['rows']} rows {r['stage']}: {r['baseline_s']:.3f}s -> {r['current_s']:.3f}s (+{r['slowdown_pct']}%)")
+        if results["regressions"]:
+            exit_code = 1
+
+    output = args.output or os.path.join(output_dir, f"{results['environment']['commit'] or 'benchmark'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"✅ {len(records)} benchmark records saved to {output}")
+    raise SystemExit(exit_code)
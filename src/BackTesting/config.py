@@ -7,6 +7,7 @@ funding_file = f"data/binance_solusdt_funding.csv"
 btc_position = 2000                        # Your initial asset balance
 position_fee = 0.0002                     # Maker fee (0.02%)
 use_compounding = True                    # Reinvest profits in BTC or not
+backtest_engine = "array"                 # "array": NumPy state machine (fast) | "loop": original iterrows engine
 
 # === Strategy configuration ===
 entry_fee_type = "entry_only"            # Options:
@@ -21,3 +22,8 @@ exit_on_low_funding = False               # If True → exit if funding income <
 # === Passive Lending ===
 enable_idle_lending = True               # If True, earn passive APY while idle (not in trade)
 idle_lending_apy = 0.0997                # Example: 9.97% APY annualized yield (on idle capital)
+
+# === Result cache ===
+use_result_cache = True                  # Reuse finished backtests when data + strategy are unchanged
+result_cache_dir = "data/cache"          # Relative to src/BackTesting
+result_cache_max_mb = 256                # Least recently used entries are evicted beyond this size
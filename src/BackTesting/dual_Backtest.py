@@ -1,51 +1,52 @@
 import config
-from Backtest_Algo import FundingArbitrageBacktest
 import os
+import numpy as np
+from strategy_config import StrategyConfig
+from multi_venue import align_venues, venue_growth, evaluate_grid, optimize_allocation, equity_metrics, allocation_equity
 
-# Rutas a los CSVs
-binance_file = "../data/binance_btcusdt_funding.csv"
-bybit_file = "../data/bybit_btcusdt_funding.csv"
+# Rutas a los CSVs (relativas a la raíz del repo)
+root_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+venue_files = {
+    "binance": os.path.join(root_dir, "data", "binance_btcusdt_funding.csv"),
+    "bybit": os.path.join(root_dir, "data", "bybit_btcusdt_funding.csv"),
+}
 
-# --- Paso 1: Correr backtests individualmente ---
-def run_backtest_for(file_path):
-    config.funding_file = file_path
-    backtester = FundingArbitrageBacktest(csv_file=file_path)
-    backtester.load_data()
-    backtester.run_backtest()
-    summary = backtester.summary()
-    return summary
+# Rebalanceo entre venues cada N periodos de funding (0 = sin rebalanceo, buy-and-hold)
+rebalance_every = 0
+# Penalización del drawdown en el optimizador continuo (APY - penalty * max drawdown)
+drawdown_penalty = 1.0
 
-summary_binance = run_backtest_for(binance_file)
-summary_bybit = run_backtest_for(bybit_file)
+# Ambos venues usan la misma estrategia; solo cambia el archivo de funding
+strategy = StrategyConfig.from_module(config, asset_name="BTC")
+venues = list(venue_files)
 
-apy_binance = summary_binance["APY Estimated (BTC-based %)"] / 100
-apy_bybit = summary_bybit["APY Estimated (BTC-based %)"] / 100
+# --- Paso 1: Alinear las series en una línea de tiempo común y simular cada venue ---
+aligned = align_venues(venue_files)
+days = (aligned["timestamp"].iloc[-1] - aligned["timestamp"].iloc[0]).days
+growth = venue_growth(aligned, venues, strategy)
 
-# --- Paso 2: Buscar el mejor split de BTC para maximizar el APY total ---
-total_btc = config.btc_position
-best_apy = 0
-best_split = (0, config.btc_position)
+single_apy, single_dd = equity_metrics(allocation_equity(growth, np.eye(len(venues)), rebalance_every), days)
 
-for i in range(0, 101):
-    pct_binance = i / 100
-    btc_binance = total_btc * pct_binance
-    btc_bybit = total_btc - btc_binance
+# --- Paso 2: Evaluar toda la grilla de splits (1%) de una sola vez ---
+weights, apy, max_dd = evaluate_grid(growth, days, steps=100, rebalance_every=rebalance_every)
+best = int(np.argmax(apy))
 
-    final_btc_binance = btc_binance * (1 + apy_binance)
-    final_btc_bybit = btc_bybit * (1 + apy_bybit)
-    final_total_btc = final_btc_binance + final_btc_bybit
-
-    apy_total = ((final_total_btc / total_btc) - 1) * 100
-
-    if apy_total > best_apy:
-        best_apy = apy_total
-        best_split = (btc_binance, btc_bybit)
+# --- Paso 3: Optimizador continuo (APY ajustado por drawdown) ---
+opt_weights, opt_score = optimize_allocation(growth, days, drawdown_penalty=drawdown_penalty, rebalance_every=rebalance_every)
+opt_apy, opt_dd = equity_metrics(allocation_equity(growth, opt_weights, rebalance_every), days)
 
 # --- Resultados ---
+total_btc = strategy.btc_position
+print(f"\nShared timeline: {aligned['timestamp'].iloc[0]} → {aligned['timestamp'].iloc[-1]} ({len(aligned)} periods, {days} days)")
+
 print("\n--- Individual Results ---")
-print(f"Binance APY: {apy_binance*100:.2f}%")
-print(f"Bybit APY: {apy_bybit*100:.2f}%")
+for name, a, dd in zip(venues, single_apy, single_dd):
+    print(f"{name.capitalize()} APY: {a:.2f}% | Max drawdown: {dd:.2f}%")
+
+print("\n--- Optimized Split (grid) ---")
+print(f"Best APY: {apy[best]:.2f}% | Max drawdown: {max_dd[best]:.2f}%")
+print(", ".join(f"BTC to {name.capitalize()}: {w * total_btc:.2f}" for name, w in zip(venues, weights[best])))
 
-print("\n--- Optimized Split ---")
-print(f"Best APY: {best_apy:.2f}%")
-print(f"BTC to Binance: {best_split[0]:.2f}, BTC to Bybit: {best_split[1]:.2f}")
+print(f"\n--- Optimized Split (continuous, drawdown penalty {drawdown_penalty}) ---")
+print(f"APY: {opt_apy[0]:.2f}% | Max drawdown: {opt_dd[0]:.2f}%")
+print(", ".join(f"BTC to {name.capitalize()}: {w * total_btc:.2f}" for name, w in zip(venues, opt_weights)))
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Storage"))
+from columnar import load_frame
+from record_store import store_path, load_records
+
+
+def read_funding_csv(csv_file):
+    # Raw (timestamp, fundingRate, price) frame exactly as stored, whatever the decimal style
+    # (Binance files use ',' and the Bybit fetcher '.'); from the columnar twin when it is current.
+    # Series with a memory-mapped record store (<name>.rec) come from it, in time order.
+    if os.path.exists(store_path(csv_file)):
+        return load_records(csv_file)
+    return load_frame(csv_file)
+
+
+def load_funding_series(csv_file):
+    # Chronological series without zero-funding rows, the same filter the backtester applies.
+    # Bybit downloads are stored newest-first inside each batch, so always sort.
+    df = read_funding_csv(csv_file)
+    df = df[df["fundingRate"] != 0].sort_values("timestamp", kind="stable")
+    return df.reset_index(drop=True)
+
+
+def align_venues(venue_files, tolerance=pd.Timedelta("1h")):
+    # As-of join of N venue series onto one shared timeline. The timeline is the first venue's
+    # funding timestamps inside the range every venue covers; each other venue contributes its
+    # nearest row within `tolerance` (their stamps drift by milliseconds or an hour of offset).
+    names = list(venue_files)
+    series = {name: load_funding_series(path) for name, path in venue_files.items()}
+
+    start = max(df["timestamp"].iloc[0] for df in series.values())
+    end = min(df["timestamp"].iloc[-1] for df in series.values())
+    base = series[names[0]]
+    aligned = base.loc[(base["timestamp"] >= start) & (base["timestamp"] <= end), ["timestamp"]].reset_index(drop=True)
+
+    for name in names:
+        venue = series[name][["timestamp", "fundingRate", "price"]].rename(
+            columns={"fundingRate": f"{name}_fundingRate", "price": f"{name}_price"}
+        )
+        aligned = pd.merge_asof(aligned, venue, on="timestamp", direction="nearest", tolerance=tolerance)
+
+    return aligned.dropna().reset_index(drop=True)
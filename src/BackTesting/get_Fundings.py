@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Exchange"))
+from http_client import print_latency_report
+from downloader import sync_funding_files, funding_csv_path
+from adapters import adapters
+
+# === Download configuration ===
+# Every symbol is fetched from every venue at once; the shared token buckets keep each
+# exchange within its request-weight budget, so a larger universe costs ~its API budget in time.
+# Files are extended from their saved cursors, so a refresh only downloads the new tail.
+symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+venues = ["binance", "bybit"]
+start_date = datetime(2019, 1, 1)
+
+base_urls = {
+    "binance": os.environ.get("BINANCE_FAPI_URL", adapters["binance"].base_url),
+    "bybit": os.environ.get("BYBIT_API_URL", adapters["bybit"].base_url),
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Download funding + mark price history for all symbols and venues concurrently")
+    parser.add_argument("--symbols", nargs="+", default=symbols)
+    parser.add_argument("--venues", nargs="+", choices=sorted(adapters), default=venues)
+    args = parser.parse_args()
+
+    jobs = [(venue, symbol) for venue in args.venues for symbol in args.symbols]
+    start_ms = int(start_date.timestamp() * 1000)
+    end_ms = int(datetime.now().timestamp() * 1000)
+
+    print(f"📡 Downloading {len(jobs)} funding series...")
+    start = time.time()
+    results = sync_funding_files(jobs, start_ms, end_ms, data_dir="data", base_urls=base_urls)
+
+    for (venue, symbol), appended in results.items():
+        if isinstance(appended, Exception):
+            print(f"⚠️ Error fetching {venue} {symbol}: {appended} (rows saved so far are kept; rerun to resume)")
+            continue
+        print(f"✅ Added {appended} rows to '{funding_csv_path('data', venue, symbol)}'")
+    print_latency_report()
+    print(f"Done in {time.time() - start:.1f}s")
@@ -3,20 +3,48 @@ import config
 import os
 import sys
 from Backtest_Algo import FundingArbitrageBacktest
+from strategy_config import StrategyConfig
+from result_cache import run_cached
 
 if __name__ == '__main__':
+    # Pass --resume to continue from the last checkpoint and only append new funding rows
+    resume = "--resume" in sys.argv[1:]
+
     # Initialize the backtest with config
-    backtester = FundingArbitrageBacktest(csv_file=config.funding_file)
+    strategy = StrategyConfig.from_module(config)
+    backtester = FundingArbitrageBacktest(csv_file=config.funding_file, strategy=strategy)
+
+    # Export results to /data folder
+    output_path = os.path.join("data", f"{config.asset_name}_backtest_info_entry_only_avg_24_idle.csv")
+    checkpoint_path = output_path + ".checkpoint.json"
+    os.makedirs("data", exist_ok=True)  # Ensure the directory exists
 
-    # Run the full backtest pipeline
-    backtester.load_data()
-    backtester.run_backtest()
-    print(backtester.summary())
+    # Run the full backtest pipeline (or only the rows after the checkpoint)
+    resumed = False
+    if resume and os.path.exists(checkpoint_path) and os.path.exists(output_path):
+        try:
+            backtester.load_data()
+            backtester.resume_backtest(checkpoint_path)
+            resumed = True
+            print(f"Resumed from checkpoint: {len(backtester.df)} new funding rows")
+        except ValueError as e:
+            print(f"⚠️ {e}")
+            backtester = FundingArbitrageBacktest(csv_file=config.funding_file, strategy=strategy)
+
+    if resumed:
+        summary = backtester.summary()
+    elif config.use_result_cache:
+        summary, hit = run_cached(backtester)
+        if hit:
+            print("Loaded backtest from result cache")
+    else:
+        backtester.load_data()
+        backtester.run_backtest()
+        summary = backtester.summary()
+    print(summary)
 
     # Optional: Uncomment for visual plot
     # backtester.plot_cumulative_profit()
 
-    # Export results to /data folder
-    output_path = os.path.join("data", f"{config.asset_name}_backtest_info_entry_only_avg_24_idle.csv")
-    os.makedirs("data", exist_ok=True)  # Ensure the directory exists
-    backtester.export_modified_csv(output_path)
+    backtester.export_modified_csv(output_path, append=resumed)
+    backtester.save_checkpoint(checkpoint_path)
@@ -0,0 +1,156 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Shared performance metrics for backtest frames, live results and the dashboards.
+# Works on the row columns every results frame carries (timestamp, price, position, profit,
+# trade_id, btc_balance); missing columns are treated as empty.
+
+PERIODS_PER_YEAR = 365 * 3   # 8h funding periods
+NS_PER_DAY = 24 * 60 * 60 * 10**9
+
+
+def period_days(timestamps):
+    # Whole days between the first and last row, the convention used everywhere for APY
+    return (timestamps.max() - timestamps.min()).days
+
+
+def apy_pct(initial_balance, final_balance, days):
+    return ((final_balance / initial_balance) ** (365 / days) - 1) * 100
+
+
+def row_series(df):
+    # Per-row arrays from a results frame
+    n = len(df)
+    position = df["position"].to_numpy(dtype=object) if "position" in df else np.full(n, None, dtype=object)
+    trade_id = df["trade_id"].notna().to_numpy() if "trade_id" in df else np.zeros(n, dtype=bool)
+    profit = df["profit"].fillna(0.0).to_numpy(dtype=float) if "profit" in df else np.zeros(n)
+    price = df["price"].to_numpy(dtype=float) if "price" in df else np.ones(n)
+    balance = df["btc_balance"].to_numpy(dtype=float)
+
+    trade_open = np.isin(position, ["long", "short"])
+    trade_exit = trade_id & pd.isna(position)
+    lending = position == "lending"
+
+    # Mark-to-market equity in asset units: open trades carry their accrued profit net of fees,
+    # exit rows add the realised profit that compounds into the next row's balance
+    equity = balance + np.where(trade_open | trade_exit, profit / price, 0.0)
+    return {
+        "timestamp": df["timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64),
+        "position": position,
+        "balance": balance,
+        "equity": equity,
+        "trade_open": trade_open,
+        "trade_exit": trade_exit,
+        "trade_profit": np.where(trade_exit, profit, 0.0),
+        "lending_profit": np.where(lending, profit, 0.0),
+        "exits": trade_exit.astype(np.int64),
+    }
+
+
+class RunningMetrics:
+    # Accumulates everything the metrics need in a few running sums, so update() can be fed the
+    # whole frame at once or just the rows appended since the last call (e.g. each hourly run).
+    def __init__(self, initial_balance=None, periods_per_year=PERIODS_PER_YEAR):
+        self.initial_balance = initial_balance
+        self.periods_per_year = periods_per_year
+        self.rows = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.final_balance = None
+        self.last_equity = None
+        self.last_position = None
+        self.peak = -math.inf
+        self.max_drawdown = 0.0
+        self.returns = 0
+        self.sum_returns = 0.0
+        self.sum_sq_returns = 0.0
+        self.sum_sq_downside = 0.0
+        self.in_market_rows = 0
+        self.net_profit = 0.0
+        self.lending_profit = 0.0
+        self.by_direction = {d: {"trades": 0, "net_profit": 0.0, "rows": 0} for d in ("long", "short")}
+
+    def update(self, df):
+        if df is None or len(df) == 0:
+            return self
+        series = row_series(df)
+        ts = series["timestamp"]
+        equity = series["equity"]
+        position = series["position"]
+
+        if self.first_ts is None:
+            self.first_ts = ts.min()
+            if self.initial_balance is None:
+                self.initial_balance = series["balance"][0]
+            self.last_equity = equity[0]
+        self.last_ts = ts.max() if self.last_ts is None else max(self.last_ts, ts.max())
+        self.final_balance = series["balance"][-1]
+        self.rows += len(df)
+
+        # Returns chain on from the last equity of the previous update
+        previous = np.concatenate([[self.last_equity], equity[:-1]])
+        returns = equity / previous - 1
+        valid = np.isfinite(returns)
+        returns = returns[valid]
+        self.returns += len(returns)
+        self.sum_returns += returns.sum()
+        self.sum_sq_returns += (returns ** 2).sum()
+        self.sum_sq_downside += (np.minimum(returns, 0.0) ** 2).sum()
+
+        peaks = np.maximum.accumulate(np.concatenate([[self.peak], equity]))[1:]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            drawdowns = 1 - equity / peaks
+        self.max_drawdown = max(self.max_drawdown, np.nanmax(drawdowns, initial=0.0))
+        self.peak = peaks[-1]
+        self.last_equity = equity[-1]
+
+        self.in_market_rows += int(series["trade_open"].sum())
+        self.net_profit += series["trade_profit"].sum()
+        self.lending_profit += series["lending_profit"].sum()
+
+        # An exit row has no position; its direction is the one held on the row before it
+        prev_position = np.concatenate([np.array([self.last_position], dtype=object), position[:-1]])
+        exit_direction = prev_position[series["trade_exit"]]
+        exit_profit = series["trade_profit"][series["trade_exit"]]
+        for direction, stats in self.by_direction.items():
+            taken = exit_direction == direction
+            stats["trades"] += int(taken.sum())
+            stats["net_profit"] += exit_profit[taken].sum()
+            stats["rows"] += int((position == direction).sum())
+        self.last_position = position[-1]
+        return self
+
+    def result(self):
+        if self.rows == 0:
+            return {}
+        days = (pd.Timestamp(self.last_ts) - pd.Timestamp(self.first_ts)).days
+        mean = self.sum_returns / self.returns if self.returns else 0.0
+        variance = self.sum_sq_returns / self.returns - mean ** 2 if self.returns else 0.0
+        std = math.sqrt(max(variance, 0.0))
+        downside = math.sqrt(self.sum_sq_downside / self.returns) if self.returns else 0.0
+        annualize = math.sqrt(self.periods_per_year)
+
+        metrics = {
+            "days": days,
+            "initial_balance": self.initial_balance,
+            "final_balance": self.final_balance,
+            "apy_pct": apy_pct(self.initial_balance, self.final_balance, days or 1),
+            "max_drawdown_pct": self.max_drawdown * 100,
+            "sharpe": mean / std * annualize if std > 0 else float("nan"),
+            "sortino": mean / downside * annualize if downside > 0 else float("nan"),
+            "time_in_market_pct": self.in_market_rows / self.rows * 100,
+            "trades": sum(s["trades"] for s in self.by_direction.values()),
+            "net_profit_usdt": self.net_profit,
+            "lending_profit_usdt": self.lending_profit,
+        }
+        for direction, stats in self.by_direction.items():
+            metrics[f"{direction}_trades"] = stats["trades"]
+            metrics[f"{direction}_net_profit_usdt"] = stats["net_profit"]
+            metrics[f"{direction}_time_in_market_pct"] = stats["rows"] / self.rows * 100
+        return metrics
+
+
+def compute_metrics(df, initial_balance=None, periods_per_year=PERIODS_PER_YEAR):
+    return RunningMetrics(initial_balance, periods_per_year).update(df).result()
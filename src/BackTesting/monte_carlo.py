@@ -0,0 +1,160 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import config
+from Backtest_Algo import FundingArbitrageBacktest
+from strategy_config import StrategyConfig
+from metrics import apy_pct
+
+# === Monte Carlo configuration ===
+n_paths = 10000
+block_length = 21          # 21 funding periods = 7 days per resampled block
+random_seed = 42
+
+
+def block_bootstrap_starts(n_rows, n_paths, block_length, rng):
+    # Moving-block bootstrap: each path is a chain of blocks of consecutive historical
+    # rows, which keeps the autocorrelation of funding regimes inside a block
+    n_blocks = -(-n_rows // block_length)
+    return rng.integers(0, n_rows - block_length + 1, size=(n_paths, n_blocks))
+
+
+def simulate_paths(fundings, log_returns, start_price, starts, block_length, strategy, days):
+    # Runs the entry/hold/exit/idle-lending rules of FundingArbitrageBacktest on every path at
+    # once: the loop walks time, and each step is a handful of array operations across paths.
+    # Everything is tracked in asset units (USDT amounts divided by the current price), so
+    # compounding matches the backtester without materialising a (paths x rows) price matrix.
+    n_paths = starts.shape[0]
+    n_rows = len(fundings)
+    fee = strategy.position_fee
+    entry_factor = strategy.entry_fee_factor
+    lending_growth = 1 + strategy.idle_period_yield if strategy.enable_idle_lending else 1.0
+
+    price = np.full(n_paths, float(start_price))
+    balance = np.full(n_paths, float(strategy.btc_position))
+    position_open = np.zeros(n_paths, dtype=bool)
+    is_short = np.zeros(n_paths, dtype=bool)
+    income_usdt = np.zeros(n_paths)
+    rounds = np.zeros(n_paths, dtype=np.int64)
+    longest = np.zeros(n_paths, dtype=np.int64)
+    trades = np.zeros(n_paths, dtype=np.int64)
+    window = np.zeros((3, n_paths))       # Last three fundings of the open trade (ring buffer)
+    window_count = np.zeros(n_paths, dtype=np.int64)
+    peak = balance.copy()
+    max_drawdown = np.zeros(n_paths)
+    paths = np.arange(n_paths)
+
+    for t in range(n_rows):
+        rows = starts[:, t // block_length] + t % block_length
+        funding = fundings[rows]
+        if t > 0:
+            price *= np.exp(log_returns[rows])
+
+        size_usdt = balance * price
+        one_side_fee = size_usdt * fee
+        step_income = np.abs(funding) * size_usdt
+        short_now = funding >= 0
+
+        can_enter = step_income >= one_side_fee * entry_factor
+        closed = ~position_open
+        enter = closed & can_enter
+        if strategy.short_only:
+            enter &= short_now
+        lend = closed & ~can_enter
+
+        # Positions that were already open this step: push the funding and test the exit rules.
+        # Slots outside the current trade's window are kept at zero, so the window sum is w0+w1+w2.
+        held = position_open.copy()
+        slot = t % 3
+        window[slot] = np.where(held, funding, window[slot])
+        window_count = np.where(held, np.minimum(window_count + 1, 3), window_count)
+        if strategy.use_avg_window:
+            avg = (window[0] + window[1] + window[2]) / np.maximum(window_count, 1)
+            exit_now = held & np.where(is_short, avg < 0, avg > 0)
+        else:
+            exit_now = held & (short_now != is_short)
+        if strategy.exit_on_low_funding:
+            exit_now |= held & (step_income <= one_side_fee)
+
+        income_usdt += np.where(held, step_income, 0.0)
+        rounds += held & ~exit_now
+
+        if exit_now.any():
+            net_profit = income_usdt - 2 * one_side_fee
+            if strategy.use_compounding:
+                balance += np.where(exit_now, net_profit / price, 0.0)
+            longest = np.where(exit_now, np.maximum(longest, rounds), longest)
+            trades += exit_now
+            position_open &= ~exit_now
+
+        if enter.any():
+            position_open |= enter
+            is_short = np.where(enter, short_now, is_short)
+            income_usdt = np.where(enter, step_income, income_usdt)
+            rounds = np.where(enter, 1, rounds)
+            window[:, enter] = 0.0
+            window[slot] = np.where(enter, funding, window[slot])
+            window_count = np.where(enter, 1, window_count)
+
+        if lending_growth != 1.0 and strategy.use_compounding:
+            balance *= np.where(lend, lending_growth, 1.0)
+
+        # Mark-to-market equity in asset units: open trades count their accrued income net of fees
+        equity = balance + np.where(position_open, (income_usdt - 2 * one_side_fee) / price, 0.0)
+        np.maximum(peak, equity, out=peak)
+        np.maximum(max_drawdown, 1 - equity / peak, out=max_drawdown)
+
+    apy = apy_pct(strategy.btc_position, balance, days)
+    return pd.DataFrame({
+        "path": paths,
+        "final_balance": balance,
+        "apy_pct": apy,
+        "max_drawdown_pct": max_drawdown * 100,
+        "trades": trades,
+        "longest_streak": longest,
+    })
+
+
+def run_monte_carlo(backtester, n_paths=n_paths, block_length=block_length, seed=random_seed):
+    # backtester must already have called load_data(); its strategy drives the simulation
+    df = backtester.df
+    fundings = df["fundingRate"].to_numpy(dtype=float)
+    prices = df["price"].to_numpy(dtype=float)
+    log_returns = np.zeros(len(prices))
+    log_returns[1:] = np.diff(np.log(prices))
+    days = (df["timestamp"].max() - df["timestamp"].min()).days
+
+    rng = np.random.default_rng(seed)
+    starts = block_bootstrap_starts(len(df), n_paths, block_length, rng)
+    return simulate_paths(fundings, log_returns, prices[0], starts, block_length, backtester.strategy, days)
+
+
+def distribution_summary(paths_df, percentiles=(5, 25, 50, 75, 95)):
+    columns = ["apy_pct", "max_drawdown_pct", "trades"]
+    rows = {f"p{q}": paths_df[columns].quantile(q / 100) for q in percentiles}
+    rows["mean"] = paths_df[columns].mean()
+    return pd.DataFrame(rows).T
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Block-bootstrap Monte Carlo of the funding arbitrage strategy")
+    parser.add_argument("--paths", type=int, default=n_paths)
+    parser.add_argument("--block", type=int, default=block_length, help="Block length in funding periods")
+    parser.add_argument("--seed", type=int, default=random_seed)
+    parser.add_argument("--output", default=None, help="Optional CSV with one row per simulated path")
+    args = parser.parse_args()
+
+    strategy = StrategyConfig.from_module(config)
+    backtester = FundingArbitrageBacktest(csv_file=config.funding_file, strategy=strategy)
+    backtester.load_data()
+
+    start = time.time()
+    paths_df = run_monte_carlo(backtester, n_paths=args.paths, block_length=args.block, seed=args.seed)
+    print(f"✅ Simulated {args.paths} paths x {len(backtester.df)} periods in {time.time() - start:.1f}s")
+    print(distribution_summary(paths_df).round(2).to_string())
+
+    if args.output:
+        paths_df.to_csv(args.output, index=False, decimal=',')
+        print(f"Per-path results saved to {args.output}")
@@ -0,0 +1,104 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+from Backtest_Algo import FundingArbitrageBacktest
+from funding_data import align_venues
+from metrics import row_series, apy_pct
+
+
+def venue_growth(aligned, venues, strategy):
+    # Runs the single-venue strategy on every venue over the shared timeline with a unit balance.
+    # Entry/exit decisions don't depend on position size and every PnL term scales with it, so
+    # each column is the growth of 1 unit of the asset placed on that venue (mark-to-market).
+    # Row 0 is the starting capital (all ones); row t+1 is the equity after aligned row t.
+    unit_strategy = strategy.with_overrides(btc_position=1.0)
+    growth = np.ones((len(aligned) + 1, len(venues)))
+    for j, name in enumerate(venues):
+        raw = pd.DataFrame({
+            "timestamp": aligned["timestamp"],
+            "fundingRate": aligned[f"{name}_fundingRate"],
+            "price": aligned[f"{name}_price"],
+        })
+        backtester = FundingArbitrageBacktest(csv_file=None, strategy=unit_strategy, engine="array")
+        backtester.load_data(raw_df=raw)
+        backtester.run_backtest()
+        # load_data drops zero-funding rows; carry equity forward over them
+        equity = pd.Series(row_series(backtester.df)["equity"], index=backtester.df.index)
+        growth[1:, j] = equity.reindex(raw.index).ffill().fillna(1.0).to_numpy()
+    return growth
+
+
+def allocation_equity(growth, weights, rebalance_every=0):
+    # Equity curves (allocations x periods) for a batch of allocations; row 0 of growth is the
+    # starting capital. rebalance_every=0 is buy-and-hold; k>0 moves capital back to the target
+    # weights every k periods (transfers between venues are assumed free). Each block of k rows
+    # grows relative to the row just before it, and block returns chain multiplicatively.
+    weights = np.atleast_2d(weights)
+    if rebalance_every <= 0:
+        return weights @ growth.T
+
+    n_periods = growth.shape[0]
+    rows = np.arange(1, n_periods)
+    block = (rows - 1) // rebalance_every
+    within = (growth[rows] / growth[block * rebalance_every]) @ weights.T   # periods x allocations
+    block_ends = np.append(np.flatnonzero(np.diff(block)), len(rows) - 1)
+    # Equity at the start of each block = product of the previous blocks' growth
+    start_equity = np.vstack([np.ones((1, weights.shape[0])), np.cumprod(within[block_ends], axis=0)[:-1]])
+    equity = np.ones((n_periods, weights.shape[0]))
+    equity[1:] = start_equity[block] * within
+    return equity.T
+
+
+def equity_metrics(equity, days):
+    # APY and max drawdown for every curve in a (allocations x periods) batch starting from 1
+    apy = apy_pct(1.0, equity[:, -1], days)
+    peak = np.maximum.accumulate(equity, axis=1)
+    max_drawdown = (1 - equity / peak).max(axis=1) * 100
+    return apy, max_drawdown
+
+
+def simplex_grid(n_venues, steps=100):
+    # Every allocation with weights in multiples of 1/steps summing to 1
+    if n_venues == 1:
+        return np.ones((1, 1))
+    cuts = itertools.combinations(range(steps + n_venues - 1), n_venues - 1)
+    rows = []
+    for c in cuts:
+        bounds = (-1,) + c + (steps + n_venues - 1,)
+        rows.append([bounds[i + 1] - bounds[i] - 1 for i in range(n_venues)])
+    return np.array(rows, dtype=float) / steps
+
+
+def evaluate_grid(growth, days, steps=100, rebalance_every=0):
+    weights = simplex_grid(growth.shape[1], steps)
+    apy, max_drawdown = equity_metrics(allocation_equity(growth, weights, rebalance_every), days)
+    return weights, apy, max_drawdown
+
+
+def optimize_allocation(growth, days, drawdown_penalty=0.0, rebalance_every=0, iterations=300, learning_rate=0.5, eps=1e-4, seed=0):
+    # Continuous optimiser over the N-venue simplex: exponentiated-gradient ascent on
+    # APY - drawdown_penalty * max drawdown. Each iteration evaluates the current point and its
+    # N finite-difference neighbours as a single batch, and the best point seen is returned.
+    n_venues = growth.shape[1]
+
+    def objective(weights):
+        apy, max_drawdown = equity_metrics(allocation_equity(growth, weights, rebalance_every), days)
+        return apy - drawdown_penalty * max_drawdown
+
+    rng = np.random.default_rng(seed)
+    w = rng.dirichlet(np.ones(n_venues))
+    best_w, best_score = w, objective(w)[0]
+    for _ in range(iterations):
+        probes = np.vstack([w, w + eps * np.eye(n_venues)])
+        probes /= probes.sum(axis=1, keepdims=True)
+        scores = objective(probes)
+        if scores[0] > best_score:
+            best_w, best_score = w, scores[0]
+        grad = (scores[1:] - scores[0]) / eps
+        scale = np.abs(grad).max()
+        if scale == 0:
+            break
+        w = w * np.exp(learning_rate * grad / scale)
+        w /= w.sum()
+    return best_w, best_score
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+import config
+
+# Bump when the backtest logic changes so older entries stop matching
+CACHE_VERSION = 1
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def backtest_key(csv_file, strategy):
+    # Content hash of the funding data + every strategy parameter: touching either one
+    # produces a different key, so stale results are never served
+    payload = {
+        "version": CACHE_VERSION,
+        "data": file_digest(csv_file),
+        "strategy": strategy.as_dict(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    # Content-addressed store of finished backtests, one pickle per key.
+    # File mtimes double as LRU timestamps; the oldest entries go once max_bytes is exceeded.
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or config.result_cache_dir
+        self.max_bytes = max_bytes or config.result_cache_max_mb * 1024 * 1024
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        os.utime(path)  # Mark as recently used
+        return entry
+
+    def put(self, key, entry):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                st = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((st.st_mtime, st.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+
+def run_cached(backtester, cache=None):
+    # Fills a freshly built FundingArbitrageBacktest either from the cache (skipping
+    # load_data/run_backtest) or by running it and storing the result. Returns (summary, hit).
+    cache = cache or ResultCache()
+    key = backtest_key(backtester.csv_file, backtester.strategy)
+
+    entry = cache.get(key)
+    if entry is not None:
+        backtester.df = entry["df"]
+        backtester.df_results = entry["df_results"]
+        backtester.results = entry["results"]
+        backtester.state = entry["state"]
+        return entry["summary"], True
+
+    backtester.load_data()
+    backtester.run_backtest()
+    summary = backtester.summary()
+    cache.put(key, {
+        "df": backtester.df,
+        "df_results": backtester.df_results,
+        "results": backtester.results,
+        "state": backtester.state,
+        "summary": summary,
+    })
+    return summary, False
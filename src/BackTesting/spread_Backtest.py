@@ -0,0 +1,28 @@
+import config
+import os
+import time
+from Backtest_Algo import FundingSpreadBacktest
+from strategy_config import StrategyConfig
+
+# Rutas a los CSVs (relativas a la raíz del repo)
+root_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+venue_files = {
+    "binance": os.path.join(root_dir, "data", "binance_btcusdt_funding.csv"),
+    "bybit": os.path.join(root_dir, "data", "bybit_btcusdt_funding.csv"),
+}
+
+# Comisión maker por venue (si falta, se usa position_fee de config.py)
+venue_fees = {"binance": 0.0002, "bybit": 0.0002}
+
+if __name__ == '__main__':
+    strategy = StrategyConfig.from_module(config, asset_name="BTC")
+    backtester = FundingSpreadBacktest(venue_files, strategy=strategy, venue_fees=venue_fees)
+
+    start = time.time()
+    backtester.load_data()
+    backtester.run_backtest()
+    print(f"Evaluated {len(backtester.df)} aligned funding periods in {time.time() - start:.2f}s")
+    print(backtester.summary())
+
+    output_path = os.path.join("data", "BTC_spread_binance_bybit.csv")
+    backtester.export_modified_csv(output_path)
@@ -0,0 +1,41 @@
+from dataclasses import dataclass, fields, replace
+
+
+@dataclass(frozen=True)
+class StrategyConfig:
+    # Immutable snapshot of the strategy settings a backtest runs with.
+    # config.py is one way to build it (from_module); sweeps and batch runs build their own.
+    asset_name: str = "BTC"
+    btc_position: float = 5                 # Initial asset balance
+    position_fee: float = 0.0002            # Maker fee (0.02%)
+    use_compounding: bool = True
+    entry_fee_type: str = "entry_only"      # "entry_only" | "half_round" | "round_trip"
+    short_only: bool = False
+    use_avg_window: bool = True
+    exit_on_low_funding: bool = False
+    enable_idle_lending: bool = False
+    idle_lending_apy: float = 0.0
+
+    @classmethod
+    def from_module(cls, module, **overrides):
+        # Read every field the module defines (e.g. config.py), falling back to the defaults
+        values = {f.name: getattr(module, f.name) for f in fields(cls) if hasattr(module, f.name)}
+        values.update(overrides)
+        return cls(**values)
+
+    def with_overrides(self, **overrides):
+        return replace(self, **overrides)
+
+    @property
+    def entry_fee_factor(self):
+        # Entry threshold in units of the one-side fee: half of a round trip is one side.
+        # Unknown types fall back to the full round trip, like the original fee table.
+        return 1.0 if self.entry_fee_type in ("entry_only", "half_round") else 2.0
+
+    @property
+    def idle_period_yield(self):
+        daily_yield = (1 + self.idle_lending_apy) ** (1 / 365) - 1
+        return daily_yield / 3  # Each funding is 8h = 1/3 day
+
+    def as_dict(self):
+        return {f.name: getattr(self, f.name) for f in fields(self)}
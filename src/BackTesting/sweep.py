@@ -0,0 +1,113 @@
+import argparse
+import contextlib
+import io
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import config
+from Backtest_Algo import FundingArbitrageBacktest
+from strategy_config import StrategyConfig
+from funding_data import read_funding_csv
+from record_store import sync_store
+from integrity import warn_if_unclean
+
+# === Sweep configuration ===
+# Every combination of these values is backtested against every asset below
+sweep_grid = {
+    "entry_fee_type": ["entry_only", "half_round", "round_trip"],
+    "short_only": [False, True],
+    "use_avg_window": [True, False],
+    "exit_on_low_funding": [False, True],
+    "enable_idle_lending": [False, True],
+    "position_fee": [0.0002, 0.0004],
+}
+
+# asset name -> (funding file, initial asset balance)
+sweep_assets = {
+    "BTC": ("data/binance_btcusdt_funding.csv", 5),
+    "ETH": ("data/binance_ethusdt_funding.csv", 5),
+    "SOL": ("data/binance_solusdt_funding.csv", 2000),
+}
+
+output_file = os.path.join("data", "sweep_results.csv")
+
+# Funding series already parsed by this worker process, keyed by file path
+_worker_series = {}
+
+
+def _load_series(csv_file):
+    if csv_file not in _worker_series:
+        _worker_series[csv_file] = read_funding_csv(csv_file)
+    return _worker_series[csv_file]
+
+
+def run_combination(task):
+    asset_name, csv_file, position, params = task
+
+    strategy = StrategyConfig.from_module(config, asset_name=asset_name, btc_position=position, **params)
+    backtester = FundingArbitrageBacktest(csv_file=csv_file, strategy=strategy, engine="array")
+    backtester.load_data(raw_df=_load_series(csv_file))
+    backtester.run_backtest()
+
+    row = {"asset": asset_name, "funding_file": csv_file, **params}
+    if backtester.df_results.empty:
+        row.update({"apy_pct": None, "net_profit_usdt": 0.0, "trades": 0, "longest_streak": 0})
+        return row
+
+    # summary() prints the balances of every run; keep the sweep output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary = backtester.summary()
+    row.update({
+        "apy_pct": summary[rf"APY Estimated ({asset_name}-based %)"],
+        "net_profit_usdt": summary["Total net profit (USDT)"],
+        "trades": summary["Number of operations"],
+        "longest_streak": summary["Longest streak"],
+    })
+    return row
+
+
+def build_tasks(grid, assets):
+    keys = list(grid)
+    tasks = []
+    # Group by asset so consecutive chunks handed to a worker reuse the same series
+    for asset_name, (csv_file, position) in assets.items():
+        for values in itertools.product(*(grid[k] for k in keys)):
+            tasks.append((asset_name, csv_file, position, dict(zip(keys, values))))
+    return tasks
+
+
+def run_sweep(grid=sweep_grid, assets=sweep_assets, workers=None):
+    tasks = build_tasks(grid, assets)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (workers * 4))
+
+    # Workers map each series' record store instead of parsing the CSV; build/sync them once here,
+    # after a gap/duplicate/ordering check of each series
+    for csv_file in dict.fromkeys(csv_file for csv_file, _ in assets.values()):
+        warn_if_unclean(csv_file)
+        sync_store(csv_file)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(run_combination, tasks, chunksize=chunksize))
+
+    ranked = pd.DataFrame(rows).sort_values(["apy_pct", "net_profit_usdt"], ascending=False, na_position="last")
+    return ranked.reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backtest every combination of strategy switches in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--output", default=output_file, help="Ranked summary CSV")
+    args = parser.parse_args()
+
+    start = time.time()
+    ranked = run_sweep(workers=args.workers)
+    print(f"✅ {len(ranked)} backtests in {time.time() - start:.1f}s")
+    print(ranked.head(20).to_string())
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    ranked.to_csv(args.output, index=False, decimal=',')
+    print(f"Ranked results saved to {args.output}")
@@ -0,0 +1,123 @@
+import argparse
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import config
+from Backtest_Algo import FundingArbitrageBacktest
+from strategy_config import StrategyConfig
+from result_cache import run_cached
+from metrics import row_series, apy_pct, NS_PER_DAY
+
+# === Walk-forward configuration ===
+window_days = 90
+step_days = 7
+output_file = os.path.join("data", "walk_forward.csv")
+
+
+class DrawdownQueue:
+    # Sliding-window max drawdown in amortised O(1) per push/pop (two-stack queue).
+    # Each element is a log-equity value; a segment is summarised as (max, min, drawdown),
+    # where drawdown is the largest x[i] - x[j] with i <= j. Summaries combine left-to-right,
+    # so the front stack keeps suffix summaries and the back stack a running prefix summary.
+    def __init__(self):
+        self.front = []   # (value, summary of this element .. newest element in front)
+        self.back = []    # values, oldest first
+        self.back_summary = None
+
+    @staticmethod
+    def _combine(a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return (max(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2], a[0] - b[1]))
+
+    def push(self, value):
+        self.back.append(value)
+        self.back_summary = self._combine(self.back_summary, (value, value, 0.0))
+
+    def pop(self):
+        if not self.front:
+            summary = None
+            while self.back:
+                value = self.back.pop()
+                summary = self._combine((value, value, 0.0), summary)
+                self.front.append((value, summary))
+            self.back_summary = None
+        self.front.pop()
+
+    def max_drawdown(self):
+        summary = self._combine(self.front[-1][1] if self.front else None, self.back_summary)
+        return 0.0 if summary is None else 1 - math.exp(-summary[2])
+
+
+def walk_forward(df, window_days=window_days, step_days=step_days):
+    # One pass over the rows: prefix sums give profit and trade counts per window,
+    # DrawdownQueue gives each window's max drawdown as the window slides forward
+    series = row_series(df)
+    ts = series["timestamp"]
+    if len(ts) == 0:
+        return pd.DataFrame()
+
+    zero = np.zeros(1)
+    trade_profit_sum = np.concatenate([zero, np.cumsum(series["trade_profit"])])
+    lending_profit_sum = np.concatenate([zero, np.cumsum(series["lending_profit"])])
+    exit_count = np.concatenate([[0], np.cumsum(series["exits"])])
+    log_equity = np.log(series["equity"]).tolist()
+
+    window_ns = int(window_days * NS_PER_DAY)
+    starts = np.arange(ts[0], ts[-1] - window_ns + 1, int(step_days * NS_PER_DAY), dtype=np.int64)
+    lo = np.searchsorted(ts, starts, side="left")
+    hi = np.searchsorted(ts, starts + window_ns, side="left")
+
+    queue = DrawdownQueue()
+    pushed = popped = 0
+    rows = []
+    for start, l, h in zip(starts, lo, hi):
+        if h <= l:
+            continue
+        while pushed < h:
+            queue.push(log_equity[pushed])
+            pushed += 1
+        while popped < l:
+            queue.pop()
+            popped += 1
+
+        days = (ts[h - 1] - ts[l]) / NS_PER_DAY
+        apy = apy_pct(series["balance"][l], series["balance"][h - 1], days) if days > 0 else float("nan")
+        rows.append({
+            "window_start": pd.Timestamp(start),
+            "window_end": pd.Timestamp(start + window_ns),
+            "rows": int(h - l),
+            "apy_pct": apy,
+            "net_profit_usdt": trade_profit_sum[h] - trade_profit_sum[l],
+            "lending_profit_usdt": lending_profit_sum[h] - lending_profit_sum[l],
+            "trades": int(exit_count[h] - exit_count[l]),
+            "max_drawdown_pct": queue.max_drawdown() * 100,
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rolling-window walk-forward metrics for the configured backtest")
+    parser.add_argument("--window-days", type=float, default=window_days)
+    parser.add_argument("--step-days", type=float, default=step_days)
+    parser.add_argument("--output", default=output_file)
+    args = parser.parse_args()
+
+    strategy = StrategyConfig.from_module(config)
+    backtester = FundingArbitrageBacktest(csv_file=config.funding_file, strategy=strategy)
+    if config.use_result_cache:
+        run_cached(backtester)
+    else:
+        backtester.load_data()
+        backtester.run_backtest()
+
+    windows = walk_forward(backtester.df, window_days=args.window_days, step_days=args.step_days)
+    print(windows.describe().round(2).to_string())
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    windows.to_csv(args.output, index=False, decimal=',')
+    print(f"✅ {len(windows)} windows saved to {args.output}")
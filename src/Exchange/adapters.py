@@ -0,0 +1,114 @@
+from abc import ABC, abstractmethod
+
+from market_data import (
+    BINANCE_FAPI, BYBIT_API, HOUR_MS, BYBIT_FUNDING_LIMIT,
+    binance_funding_request, parse_binance_funding, next_binance_funding_start,
+    binance_kline_requests, parse_binance_klines,
+    bybit_funding_request, parse_bybit_funding, next_bybit_funding_end,
+    bybit_kline_requests, parse_bybit_klines, bybit_cache_venue,
+)
+
+# One adapter per venue: everything the downloader needs to know about an exchange API.
+# Requests are (path, params, weights) as in market_data; `get` is the downloader's coroutine
+# that sends one and returns the decoded JSON. Adding a venue means writing an adapter and
+# registering it; the downloader, cursors, CSV files and get_Fundings.py pick it up by name.
+
+
+class ExchangeAdapter(ABC):
+    name = None
+    base_url = None
+    csv_decimal = "."   # decimal separator of new funding CSVs (existing files keep theirs)
+
+    @abstractmethod
+    def funding_pages(self, get, symbol, start_ms, end_ms):
+        # Async generator of (page, next_start_ms): pages of [(funding time ms, rate)] oldest
+        # first, each with the start time a resumed download should continue from
+        ...
+
+    @property
+    def cache_venue(self):
+        # Series name in price_cache
+        return self.name
+
+    @abstractmethod
+    def kline_requests(self, symbol, start_ms, end_ms):
+        # Requests for the mark-price candles in [start_ms, end_ms], one exchange page each
+        ...
+
+    @abstractmethod
+    def parse_klines(self, data):
+        # {candle open time ms: open price}
+        ...
+
+
+class BinanceAdapter(ExchangeAdapter):
+    name = "binance"
+    base_url = BINANCE_FAPI
+    csv_decimal = ","
+
+    async def funding_pages(self, get, symbol, start_ms, end_ms):
+        # Pages forward from start_ms. After the last page the download resumes just past its
+        # newest row (or at end_ms if there was nothing at all, e.g. before a symbol was listed).
+        cursor = start_ms
+        while cursor is not None and cursor < end_ms:
+            page = parse_binance_funding(await get(binance_funding_request(symbol, cursor, end_ms)))
+            cursor = next_binance_funding_start(page)
+            if cursor is None:
+                yield page, page[-1][0] + 1 if page else end_ms
+            else:
+                yield page, cursor
+
+    def kline_requests(self, symbol, start_ms, end_ms):
+        return binance_kline_requests(symbol, start_ms, end_ms)
+
+    def parse_klines(self, data):
+        return parse_binance_klines(data)
+
+
+class BybitAdapter(ExchangeAdapter):
+    name = "bybit"
+    base_url = BYBIT_API
+    csv_decimal = "."
+
+    def __init__(self, category="linear"):
+        self.category = category
+
+    @property
+    def cache_venue(self):
+        return bybit_cache_venue(self.category)
+
+    async def funding_pages(self, get, symbol, start_ms, end_ms):
+        # Bybit answers newest first, so history is walked forward in windows of one page of 8h
+        # fundings, paging backwards inside a window only when it holds more (shorter intervals)
+        window = BYBIT_FUNDING_LIMIT * 8 * HOUR_MS
+        lo = start_ms
+        while lo < end_ms:
+            hi = min(lo + window - 1, end_ms)
+            rows = []
+            cursor = hi
+            while cursor is not None and cursor >= lo:
+                page = parse_bybit_funding(await get(bybit_funding_request(symbol, lo, cursor, self.category)))
+                rows.extend(page)
+                cursor = next_bybit_funding_end(page)
+            rows = sorted(set(rows))
+            last_window = hi == end_ms
+            lo = hi + 1
+            yield rows, rows[-1][0] + 1 if last_window and rows else lo
+
+    def kline_requests(self, symbol, start_ms, end_ms):
+        return bybit_kline_requests(symbol, start_ms, end_ms, self.category)
+
+    def parse_klines(self, data):
+        return parse_bybit_klines(data)
+
+
+adapters = {}
+
+
+def register_adapter(adapter):
+    adapters[adapter.name] = adapter
+    return adapter
+
+
+register_adapter(BinanceAdapter())
+register_adapter(BybitAdapter())
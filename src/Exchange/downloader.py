@@ -0,0 +1,130 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+from rate_limit import buckets
+from http_client import get_client, pool_size
+from funding_files import CursorStore, cursor_file, resume_point, append_funding_rows
+from market_data import kline_range, with_prices
+from price_cache import price_cache
+from adapters import adapters
+
+# Concurrent funding + mark-price downloads for many (venue, symbol) pairs on any venue with a
+# registered adapter (adapters.py). Every request first draws its weight from the shared token
+# buckets in rate_limit, so the total request rate follows each exchange's budget however many
+# symbols are queued; the blocking calls go through the pooled http_client in a thread pool so
+# the event loop keeps every symbol's pagination moving. Mark prices already in price_cache are
+# not requested again.
+
+max_connections = pool_size
+
+
+class AsyncDownloader:
+    def __init__(self, base_urls=None, max_workers=max_connections, cache=price_cache):
+        self.cache = cache
+        self.base_urls = {name: adapter.base_url for name, adapter in adapters.items()}
+        self.base_urls.update(base_urls or {})
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.request_count = 0
+
+    async def get(self, venue, request):
+        # Weights are drawn here without blocking the loop; retries/backoff happen in the client
+        path, params, weights = request
+        for name, weight in weights.items():
+            await buckets[name].acquire(weight)
+        self.request_count += 1
+        client = get_client(self.base_urls[venue])
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, client.get_json, path, params)
+
+    async def get_all(self, venue, requests_, parse):
+        pages = await asyncio.gather(*(self.get(venue, r) for r in requests_))
+        merged = {}
+        for page in pages:
+            merged.update(parse(page))
+        return merged
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+async def with_page_prices(downloader, venue, symbol, page):
+    # Candle pages for one funding page don't depend on each other: all go out at once
+    if not page:
+        return []
+    adapter = adapters[venue]
+    start, end = kline_range([t for t, _ in page])
+    cache = downloader.cache
+    if cache is None:
+        return with_prices(page, await downloader.get_all(venue, adapter.kline_requests(symbol, start, end), adapter.parse_klines))
+    runs = cache.missing(adapter.cache_venue, symbol, start, end)
+    fetched = await asyncio.gather(*(downloader.get_all(venue, adapter.kline_requests(symbol, lo, hi), adapter.parse_klines)
+                                     for lo, hi in runs))
+    for (lo, hi), prices in zip(runs, fetched):
+        cache.store(adapter.cache_venue, symbol, lo, hi, prices)
+    return with_prices(page, cache.prices(adapter.cache_venue, symbol, start, end))
+
+
+async def fetch_symbol(downloader, venue, symbol, start_ms, end_ms, on_page=None):
+    # on_page(records, next_start_ms) runs after every priced page, e.g. to append and save a cursor
+    records = []
+    get = lambda request: downloader.get(venue, request)
+    async for page, next_start in adapters[venue].funding_pages(get, symbol, start_ms, end_ms):
+        rows = await with_page_prices(downloader, venue, symbol, page)
+        if on_page is not None:
+            on_page(rows, next_start)
+        records.extend(rows)
+    return records
+
+
+async def _gather_jobs(jobs, make_task):
+    # One failing symbol is reported in its slot instead of cancelling the others
+    results = await asyncio.gather(*(make_task(venue, symbol) for venue, symbol in jobs), return_exceptions=True)
+    return dict(zip(jobs, results))
+
+
+def funding_csv_path(data_dir, venue, symbol):
+    return os.path.join(data_dir, f"{venue}_{symbol.lower()}_funding.csv")
+
+
+def sync_funding_files(jobs, start_ms, end_ms, data_dir="data", base_urls=None, max_workers=max_connections,
+                       cache=price_cache):
+    # Brings data/<venue>_<symbol>_funding.csv up to end_ms: each series continues from its saved
+    # cursor (or the file tail), every page is appended to the file and its cursor saved right away,
+    # so an interrupted run resumes where it stopped and a refresh only fetches the new tail.
+    # Returns {(venue, symbol): rows appended or Exception}.
+    store = CursorStore(os.path.join(data_dir, cursor_file))
+    downloader = AsyncDownloader(base_urls, max_workers, cache)
+
+    async def sync(venue, symbol):
+        path = funding_csv_path(data_dir, venue, symbol)
+        start, last_row = resume_point(path, store, venue, symbol, start_ms)
+        state = {"last_row": last_row, "appended": 0}
+
+        def on_page(rows, next_start):
+            # Rows at or before the file's last row can come back when the tail was the resume point
+            rows = [r for r in rows if state["last_row"] is None or r["fundingTime"] > state["last_row"]]
+            if rows:
+                append_funding_rows(path, funding_frame(rows), adapters[venue].csv_decimal)
+                state["last_row"] = max(r["fundingTime"] for r in rows)
+                state["appended"] += len(rows)
+            store.set(venue, symbol, next_start, state["last_row"])
+
+        await fetch_symbol(downloader, venue, symbol, start, end_ms, on_page)
+        return state["appended"]
+
+    try:
+        return asyncio.run(_gather_jobs(jobs, sync))
+    finally:
+        downloader.close()
+
+
+def funding_frame(records):
+    # Same columns as the original fetchers: naive local timestamp, fundingRate, price
+    return pd.DataFrame([{
+        "timestamp": datetime.fromtimestamp(r["fundingTime"] / 1000),
+        "fundingRate": r["fundingRate"],
+        "price": r["price"]
+    } for r in records])
@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Storage"))
+from columnar import sniff_decimal
+
+# Funding CSVs extended in place, plus a per-(venue, symbol) download cursor saved after every page.
+# A cursor holds the first funding time (ms) still to request and the last row written to the file.
+# It can run ahead of the file across pages with no rows (e.g. before a symbol was listed); when it
+# disagrees with the file tail (a run killed between appending and saving, or an edited file), the
+# file wins, so a page is never appended twice.
+
+cursor_file = "download_cursors.json"
+tail_window = 256   # lines read from the end to find the newest row
+
+
+class CursorStore:
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.cursors = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.cursors = {}
+
+    @staticmethod
+    def key(venue, symbol):
+        return f"{venue}:{symbol}"
+
+    def get(self, venue, symbol):
+        return self.cursors.get(self.key(venue, symbol))
+
+    def set(self, venue, symbol, next_start_ms, last_row_ms):
+        self.cursors[self.key(venue, symbol)] = {
+            "next_start_ms": int(next_start_ms),
+            "last_row_ms": None if last_row_ms is None else int(last_row_ms),
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.save()
+
+    def save(self):
+        # Atomic replace so an interrupted run never leaves a half-written cursor file
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.cursors, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def tail_lines(path, n):
+    # Last n complete lines, read backwards in blocks so the cost doesn't grow with the file
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+            if data.rstrip(b"\r\n").count(b"\n") >= n:
+                break
+    lines = data.rstrip(b"\r\n").splitlines()
+    if pos > 0:
+        lines = lines[1:]   # the first one may start mid-line
+    return [line.decode() for line in lines[-n:]]
+
+
+def repair_tail(path):
+    # Drops a torn last line (no trailing newline) left by a run killed mid-append
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return
+        pos = f.tell()
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            newline = f.read(step).rfind(b"\n")
+            if newline >= 0:
+                f.truncate(pos + newline + 1)
+                return
+        f.truncate(0)
+
+
+def tail_timestamp(path):
+    # (timestamp string of the last line, newest row's datetime) or (None, None) for a
+    # missing/header-only file. The last line isn't always the newest row: the old Bybit fetcher
+    # wrote each batch newest-first. An ordered tail is trusted, anything else scans the file.
+    if not os.path.exists(path):
+        return None, None
+    lines = [line for line in tail_lines(path, tail_window) if line and not line.startswith("timestamp")]
+    if not lines:
+        return None, None
+    stamps = [line.split(",", 1)[0] for line in lines]
+    parsed = pd.to_datetime(pd.Series(stamps))
+    if parsed.is_monotonic_increasing:
+        newest = parsed.iloc[-1]
+    else:
+        newest = pd.read_csv(path, usecols=["timestamp"], parse_dates=["timestamp"])["timestamp"].max()
+    return stamps[-1], newest.to_pydatetime()
+
+
+def last_row_ms(path):
+    # Timestamps are naive local time, as written by datetime.fromtimestamp in funding_frame
+    _, last = tail_timestamp(path)
+    return None if last is None else round(last.timestamp() * 1000)
+
+
+def resume_point(path, store, venue, symbol, default_start_ms):
+    # (next start ms, last row ms) to continue the download from
+    on_disk = last_row_ms(path)
+    cursor = store.get(venue, symbol)
+    if cursor is not None and cursor.get("last_row_ms") == on_disk:
+        return max(cursor["next_start_ms"], default_start_ms), on_disk
+    if on_disk is None:
+        return default_start_ms, None
+    return max(on_disk + 1, default_start_ms), on_disk
+
+
+def _timestamp_format(sample):
+    # Same precision as the rows already in the file (none, milliseconds or microseconds)
+    digits = len(sample.split(".", 1)[1]) if sample and "." in sample else 0
+    return lambda ts: ts.strftime("%Y-%m-%d %H:%M:%S.%f")[:20 + digits] if digits else ts.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def append_funding_rows(path, frame, decimal):
+    # Appends funding_frame rows; a new file gets the header, millisecond timestamps and `decimal`,
+    # an existing one keeps the decimal separator it was written with.
+    # The rows go out in one O_APPEND write, so the file only ever gains whole lines at its end.
+    if frame.empty:
+        return
+    repair_tail(path)
+    lines = tail_lines(path, 1) if os.path.exists(path) else []
+    sample = lines[-1].split(",", 1)[0] if lines and not lines[-1].startswith("timestamp") else None
+    rows = frame.copy()
+    rows["timestamp"] = rows["timestamp"].map(_timestamp_format(sample or "2019-01-01 00:00:00.000"))
+    exists = os.path.exists(path) and os.path.getsize(path) > 0
+    if sample is not None:
+        decimal = sniff_decimal(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    text = rows.to_csv(header=not exists, index=False, decimal=decimal, lineterminator="\n")
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, text.encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Streaming predicted funding for one symbol. Binance pushes a markPriceUpdate every second with
+# the mark price, the predicted rate of the next funding and its time; FundingStream keeps the
+# latest one in memory and calls on_settlement(event) the moment that funding time passes, from a
+# timer armed on the clock, so the bot doesn't wait for the next fetch/scheduler tick.
+#
+# The message source is any async iterator of decoded markPriceUpdate dicts: the Binance
+# websocket (needs the optional `websockets` package) or ReplayFeed, a local stand-in that
+# replays stored fundings on an accelerated clock.
+
+BINANCE_FSTREAM = "wss://fstream.binance.com"
+
+MarkPriceUpdate = namedtuple("MarkPriceUpdate", "symbol event_time mark_price funding_rate next_funding_time")
+# detected_at is the clock time (ms) the settlement was pushed; lag_ms = detected_at - funding_time
+SettlementEvent = namedtuple("SettlementEvent", "symbol funding_time funding_rate mark_price detected_at lag_ms")
+
+
+def parse_mark_price_event(message):
+    # markPriceUpdate (also inside a combined-stream {"stream", "data"} wrapper) or None
+    data = message.get("data", message) if isinstance(message, dict) else None
+    if not data or data.get("e") != "markPriceUpdate" or data.get("r") in (None, ""):
+        return None
+    return MarkPriceUpdate(data["s"], int(data["E"]), float(data["p"]), float(data["r"]), int(data["T"]))
+
+
+class WallClock:
+    def now(self):
+        return time.time() * 1000
+
+    def seconds_until(self, ms):
+        return (ms - self.now()) / 1000
+
+
+class FundingStream:
+    def __init__(self, symbol, on_settlement, clock=None):
+        self.symbol = symbol.upper()
+        self.on_settlement = on_settlement
+        self.clock = clock or WallClock()
+        self.latest = None              # newest MarkPriceUpdate for the pending funding
+        self.last_settled = None        # funding time (ms) of the last event pushed
+        self.updates = 0
+        self._timer = None
+        self._timer_for = None
+
+    def handle(self, message):
+        update = parse_mark_price_event(message)
+        if update is None or update.symbol != self.symbol:
+            return
+        self.updates += 1
+        pending = self.latest
+        if pending is not None and update.next_funding_time > pending.next_funding_time:
+            # Funding time rolled over before the timer fired: settle with the last prediction
+            self._settle(pending)
+        if pending is None or update.next_funding_time >= pending.next_funding_time:
+            self.latest = update
+        if self.clock.now() >= self.latest.next_funding_time:
+            self._settle(self.latest)
+        else:
+            self._arm()
+
+    def _arm(self):
+        funding_time = self.latest.next_funding_time
+        if self._timer_for == funding_time:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(max(0.0, self.clock.seconds_until(funding_time)), self._on_timer, funding_time)
+        self._timer_for = funding_time
+
+    def _on_timer(self, funding_time):
+        self._timer = self._timer_for = None
+        if self.latest is not None and self.latest.next_funding_time == funding_time:
+            self._settle(self.latest)
+
+    def _settle(self, update):
+        # Once per funding time; the last prediction before settlement is the settled rate
+        if self.last_settled is not None and update.next_funding_time <= self.last_settled:
+            return
+        self.last_settled = update.next_funding_time
+        detected_at = self.clock.now()
+        self.on_settlement(SettlementEvent(self.symbol, update.next_funding_time, update.funding_rate,
+                                           update.mark_price, detected_at, detected_at - update.next_funding_time))
+
+    async def run(self, messages):
+        try:
+            async for message in messages:
+                self.handle(message)
+        finally:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = self._timer_for = None
+
+
+async def binance_mark_price_messages(symbol, url=BINANCE_FSTREAM, max_delay=30):
+    # Decoded messages from <symbol>@markPrice@1s, reconnecting with backoff when dropped
+    try:
+        import websockets
+    except ImportError:
+        raise RuntimeError("The live funding stream needs the websockets package (pip install websockets)")
+    stream_url = f"{url}/ws/{symbol.lower()}@markPrice@1s"
+    delay = 1
+    while True:
+        try:
+            async with websockets.connect(stream_url, ping_interval=20) as ws:
+                delay = 1
+                async for raw in ws:
+                    yield json.loads(raw)
+        except (OSError, websockets.ConnectionClosed) as e:
+            print(f"⚠️ Funding stream dropped ({e}), reconnecting in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+
+class ReplayFeed:
+    # Local stand-in for the websocket: markPriceUpdate messages from stored fundings on a clock
+    # running `speed` times faster than real time. Between two fundings the prediction and the
+    # mark price are the stored rate and price of the next one. Also the stream's clock.
+    def __init__(self, symbol, times, rates, prices, start_ms=None, speed=3600.0, interval=0.05):
+        self.symbol = symbol.upper()
+        self.times = np.asarray(times, dtype=np.int64)
+        self.rates = np.asarray(rates, dtype=float)
+        self.prices = np.asarray(prices, dtype=float)
+        self.start_ms = int(self.times[0]) - 1 if start_ms is None else int(start_ms)
+        self.speed = speed
+        self.interval = interval     # real seconds between messages
+        self._started = None
+
+    def now(self):
+        elapsed = 0.0 if self._started is None else time.monotonic() - self._started
+        return self.start_ms + elapsed * 1000 * self.speed
+
+    def seconds_until(self, ms):
+        return (ms - self.now()) / 1000 / self.speed
+
+    def message(self, now):
+        i = np.searchsorted(self.times, now, side="right")
+        if i >= len(self.times):
+            return None
+        price = self.prices[i]
+        return {"e": "markPriceUpdate", "E": int(now), "s": self.symbol, "p": repr(float(price)),
+                "i": repr(float(price)), "P": repr(float(price)), "r": repr(float(self.rates[i])),
+                "T": int(self.times[i])}
+
+    def __aiter__(self):
+        return self._messages()
+
+    async def _messages(self):
+        self._started = time.monotonic()
+        while True:
+            message = self.message(self.now())
+            if message is None:
+                # Past the last stored funding: leave time for its settlement to be pushed
+                await asyncio.sleep(self.interval)
+                return
+            yield message
+            await asyncio.sleep(self.interval)
+
+
+def replay_feed_from_csv(path, symbol, decimal=",", utc=True, **kwargs):
+    # Funding CSV (timestamp, fundingRate, price). The live file stores naive UTC, the
+    # history downloads naive local time (utc=False)
+    df = pd.read_csv(path, parse_dates=["timestamp"], decimal=decimal).dropna(subset=["timestamp", "price"])
+    df = df.sort_values("timestamp")
+    stamps = df["timestamp"].dt.tz_localize("UTC") if utc else df["timestamp"]
+    times = [round(ts.timestamp() * 1000) for ts in stamps]
+    return ReplayFeed(symbol, times, df["fundingRate"], df["price"], **kwargs)
@@ -0,0 +1,145 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from rate_limit import buckets
+
+# === HTTP client configuration ===
+pool_size = 16
+connect_timeout = 5
+read_timeout = 30
+max_retries = 5
+backoff_base = 0.5     # seconds; attempt n waits up to backoff_base * 2**n (full jitter)
+backoff_cap = 30
+# 418 is Binance's IP ban after ignoring 429s; both carry Retry-After
+retry_statuses = {418, 429, 500, 502, 503, 504}
+# Back off before the exchange does: pause once the reported used weight passes this share
+weight_pause_fraction = 0.9
+binance_weight_limit_1m = 2400
+
+
+class LatencyStats:
+    # Per-path request counters, shared by every thread using the client
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.paths = {}
+
+    def record(self, path, seconds, retries=0, error=False):
+        with self._lock:
+            s = self.paths.setdefault(path, {"requests": 0, "retries": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0})
+            s["requests"] += 1
+            s["retries"] += retries
+            s["errors"] += int(error)
+            s["total_s"] += seconds
+            s["max_s"] = max(s["max_s"], seconds)
+
+    def report(self):
+        with self._lock:
+            return [
+                {"path": path, **s, "mean_ms": s["total_s"] / s["requests"] * 1000 if s["requests"] else 0.0}
+                for path, s in sorted(self.paths.items())
+            ]
+
+
+class ExchangeClient:
+    # Keep-alive connection pool for one exchange base URL, with timeouts, retries on 429/418/5xx
+    # and connection errors (jittered exponential backoff, at least Retry-After), and a pause
+    # shared by all threads when the exchange reports its weight budget is nearly used up.
+    def __init__(self, base_url, pool=pool_size, timeout=(connect_timeout, read_timeout), retries=max_retries):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.stats = LatencyStats()
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    def _pause(self, seconds):
+        with self._lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + seconds)
+
+    def _wait_for_pause(self):
+        delay = self._pause_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _backoff(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(backoff_cap, backoff_base * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    def _read_weight_headers(self, resp):
+        # Binance: X-MBX-USED-WEIGHT-1M is the weight used in the current minute.
+        # Bybit: X-Bapi-Limit-Status is the requests left until X-Bapi-Limit-Reset-Timestamp (ms).
+        used = resp.headers.get("X-MBX-USED-WEIGHT-1M")
+        if used is not None and int(used) >= binance_weight_limit_1m * weight_pause_fraction:
+            self._pause(60 - time.time() % 60)
+        remaining = resp.headers.get("X-Bapi-Limit-Status")
+        reset = resp.headers.get("X-Bapi-Limit-Reset-Timestamp")
+        if remaining is not None and reset is not None and int(remaining) <= 0:
+            self._pause(max(0.0, int(reset) / 1000 - time.time()))
+
+    def get_json(self, path, params=None, weights=None):
+        # weights: rate_limit bucket name -> cost, drawn before the first attempt only
+        for name, weight in (weights or {}).items():
+            buckets[name].wait(weight)
+
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            self._wait_for_pause()
+            try:
+                resp = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    self.stats.record(path, time.perf_counter() - start, attempt, error=True)
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            self._read_weight_headers(resp)
+            if resp.status_code in retry_statuses and attempt < self.retries:
+                retry_after = resp.headers.get("Retry-After")
+                delay = self._backoff(attempt, float(retry_after) if retry_after else None)
+                if resp.status_code in (418, 429):
+                    # Everyone using this exchange has to wait, not just this request
+                    self._pause(delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            elapsed = time.perf_counter() - start
+            try:
+                resp.raise_for_status()
+            except requests.HTTPError:
+                self.stats.record(path, elapsed, attempt, error=True)
+                raise
+            self.stats.record(path, elapsed, attempt)
+            return resp.json()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url):
+    # One shared client (and connection pool) per exchange base URL in this process
+    with _clients_lock:
+        if base_url not in _clients:
+            _clients[base_url] = ExchangeClient(base_url)
+        return _clients[base_url]
+
+
+def latency_report():
+    return [{"base_url": url, **row} for url, client in _clients.items() for row in client.stats.report()]
+
+
+def print_latency_report():
+    for row in latency_report():
+        print(f"{row['base_url']}{row['path']}: {row['requests']} requests, {row['retries']} retries, "
+              f"{row['errors']} errors, mean {row['mean_ms']:.0f} ms, max {row['max_s'] * 1000:.0f} ms")
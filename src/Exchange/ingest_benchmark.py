@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import rate_limit
+from http_client import latency_report
+from adapters import adapters
+from downloader import sync_funding_files, funding_csv_path
+from replay_server import start_replay_server
+from price_cache import PriceCache
+from columnar import sniff_decimal
+
+# Offline benchmark of the full ingestion pipeline (adapters -> rate limits -> pooled client ->
+# asyncio downloader -> cursors + CSV appends) against the replay server. Each series is also
+# checked against its source file, so the run doubles as an end-to-end test. Replayed prices go
+# to a throwaway price cache, never the shared one; a second full download into a fresh folder
+# measures a re-download with that cache warm.
+
+default_data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "BackTesting", "data")
+start_date = datetime(2019, 1, 1)
+
+
+def same_series(source_path, copy_path):
+    # Funding times, rates and prices as stored, whatever the timestamp precision or decimal style
+    def load(path):
+        df = pd.read_csv(path, decimal=sniff_decimal(path), parse_dates=["timestamp"])
+        return df.sort_values("timestamp", kind="stable").drop_duplicates("timestamp").reset_index(drop=True)
+
+    source, copy = load(source_path), load(copy_path)
+    if len(source) != len(copy):
+        return False
+    return bool(
+        (source["timestamp"] == copy["timestamp"]).all()
+        and (source["fundingRate"] == copy["fundingRate"]).all()
+        and ((source["price"] == copy["price"]) | source["price"].isna()).all()
+    )
+
+
+def run_ingest_benchmark(data_dir, venues=None, symbols=None, latency=0.0, rate_limited=False, workers=None):
+    server = start_replay_server(data_dir, latency=latency)
+    jobs = [(v, s) for v, s in sorted(server.series)
+            if (venues is None or v in venues) and (symbols is None or s in symbols) and v in adapters]
+    if not rate_limited:
+        rate_limit.configure({name: (float("inf"), 1) for name in rate_limit.buckets})
+
+    start_ms = int(start_date.timestamp() * 1000)
+    end_ms = int(time.time() * 1000)
+    base_urls = {venue: server.base_url for venue in adapters}
+    try:
+        with tempfile.TemporaryDirectory() as out_dir:
+            kwargs = {"max_workers": workers} if workers else {}
+            kwargs["cache"] = PriceCache(os.path.join(out_dir, "price_cache"))
+            started = time.perf_counter()
+            results = sync_funding_files(jobs, start_ms, end_ms, data_dir=out_dir, base_urls=base_urls, **kwargs)
+            elapsed = time.perf_counter() - started
+
+            series = []
+            for (venue, symbol), appended in results.items():
+                ok = not isinstance(appended, Exception)
+                source = funding_csv_path(data_dir, venue, symbol)
+                series.append({
+                    "venue": venue,
+                    "symbol": symbol,
+                    "rows": appended if ok else 0,
+                    "error": None if ok else str(appended),
+                    "matches_source": ok and same_series(source, funding_csv_path(out_dir, venue, symbol)),
+                })
+
+            refresh_started = time.perf_counter()
+            sync_funding_files(jobs, start_ms, end_ms, data_dir=out_dir, base_urls=base_urls, **kwargs)
+            refresh_elapsed = time.perf_counter() - refresh_started
+
+            counts_before = dict(server.request_counts)
+            redownload_dir = os.path.join(out_dir, "redownload")
+            redownload_started = time.perf_counter()
+            sync_funding_files(jobs, start_ms, end_ms, data_dir=redownload_dir, base_urls=base_urls, **kwargs)
+            redownload_elapsed = time.perf_counter() - redownload_started
+            redownload_requests = {path: count - counts_before.get(path, 0) for path, count in server.request_counts.items()}
+            for s in series:
+                s["matches_source"] = s["matches_source"] and same_series(
+                    funding_csv_path(data_dir, s["venue"], s["symbol"]), funding_csv_path(redownload_dir, s["venue"], s["symbol"]))
+    finally:
+        server.shutdown()
+
+    rows = sum(s["rows"] for s in series)
+    requests_ = sum(server.request_counts.values())
+    return {
+        "created_at": datetime.now(tz=timezone.utc).isoformat(),
+        "latency_s": latency,
+        "rate_limited": rate_limited,
+        "series": series,
+        "rows": rows,
+        "requests": requests_,
+        "elapsed_s": round(elapsed, 4),
+        "rows_per_s": round(rows / elapsed, 1) if elapsed else None,
+        "refresh_elapsed_s": round(refresh_elapsed, 4),
+        "redownload_elapsed_s": round(redownload_elapsed, 4),
+        "redownload_requests": redownload_requests,
+        "server_requests": server.request_counts,
+        "client_latency": latency_report(),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark/test the ingestion pipeline offline against the replay server")
+    parser.add_argument("--data-dir", default=default_data_dir, help="Folder of <venue>_<symbol>_funding.csv files to replay")
+    parser.add_argument("--venues", nargs="+", default=None)
+    parser.add_argument("--symbols", nargs="+", default=None)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per response")
+    parser.add_argument("--rate-limited", action="store_true", help="Keep the real exchange budgets")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    result = run_ingest_benchmark(args.data_dir, args.venues, args.symbols, args.latency, args.rate_limited, args.workers)
+    for s in result["series"]:
+        status = "✅" if s["matches_source"] else "❌"
+        print(f"{status} {s['venue']:<8} {s['symbol']:<10} {s['rows']} rows" + (f" ({s['error']})" if s["error"] else ""))
+    print(f"{result['rows']} rows, {result['requests']} requests in {result['elapsed_s']:.2f}s "
+          f"({result['rows_per_s']} rows/s); refresh {result['refresh_elapsed_s']:.2f}s")
+    print(f"Re-download with warm price cache: {result['redownload_elapsed_s']:.2f}s, requests {result['redownload_requests']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2, default=str)
+        print(f"Results saved to {args.output}")
+    raise SystemExit(0 if all(s["matches_source"] for s in result["series"]) else 1)
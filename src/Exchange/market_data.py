@@ -0,0 +1,186 @@
+import numpy as np
+from http_client import get_client
+from price_cache import price_cache
+
+# Request builders and response parsers for funding history and mark-price klines on Binance
+# USDⓈ-M futures and Bybit v5, plus the blocking Binance fetchers Daily_Fund_Fetcher uses and
+# the single-request fetch the scanner also calls.
+# Prices are fetched as bulk kline ranges (one request per exchange page) and joined to the
+# funding timestamps locally, instead of one limit=1 kline request per funding row.
+# base_url is a parameter everywhere so the fetchers can be pointed at a local stub server.
+#
+# A request is (path, params, weights), where weights maps rate_limit bucket names to the
+# request's cost. The exchange adapters behind the asyncio downloader build and parse their
+# requests with the helpers below, as do the blocking Binance fetchers; both send them through
+# the pooled http_client. Mark prices go through price_cache first: only hours not stored yet
+# are requested.
+
+BINANCE_FAPI = "https://fapi.binance.com"
+BYBIT_API = "https://api.bybit.com"
+
+HOUR_MS = 60 * 60 * 1000
+INTERVAL_MS = {"1h": HOUR_MS, "60": HOUR_MS}
+
+# Page limits documented by each exchange
+BINANCE_FUNDING_LIMIT = 1000
+BINANCE_KLINE_LIMIT = 1500
+BYBIT_FUNDING_LIMIT = 200
+BYBIT_KLINE_LIMIT = 1000
+
+
+def floor_hour(ms):
+    return ms - ms % HOUR_MS
+
+
+def kline_windows(start_ms, end_ms, interval, limit):
+    # [start, end] ranges of exactly one page of candles each
+    step = limit * INTERVAL_MS[interval]
+    return [(s, min(s + step - 1, end_ms)) for s in range(start_ms, end_ms + 1, step)]
+
+
+# === Binance ===
+def binance_kline_weight(limit):
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+def binance_funding_request(symbol, start_ms, end_ms, limit=BINANCE_FUNDING_LIMIT):
+    params = {"symbol": symbol, "startTime": start_ms, "endTime": end_ms, "limit": limit}
+    return "/fapi/v1/fundingRate", params, {"binance": 1, "binance_funding": 1}
+
+
+def parse_binance_funding(data):
+    return [(int(e["fundingTime"]), float(e["fundingRate"])) for e in data or []]
+
+
+def next_binance_funding_start(page, limit=BINANCE_FUNDING_LIMIT):
+    # Pages go forward in time; a short page is the last one
+    return page[-1][0] + 1 if len(page) >= limit else None
+
+
+def binance_kline_requests(symbol, start_ms, end_ms, interval="1h", limit=BINANCE_KLINE_LIMIT):
+    weights = {"binance": binance_kline_weight(limit)}
+    return [
+        ("/fapi/v1/markPriceKlines",
+         {"symbol": symbol, "interval": interval, "startTime": lo, "endTime": hi, "limit": limit},
+         weights)
+        for lo, hi in kline_windows(start_ms, end_ms, interval, limit)
+    ]
+
+
+def parse_binance_klines(data):
+    # {open time ms: open price}
+    return {int(k[0]): float(k[1]) for k in data} if isinstance(data, list) else {}
+
+
+def binance_premium_index_request(symbol=None):
+    # Mark price, index price, predicted funding rate and next funding time; without a symbol
+    # one response covers every contract (weight 10 instead of 1)
+    if symbol:
+        return "/fapi/v1/premiumIndex", {"symbol": symbol}, {"binance": 1}
+    return "/fapi/v1/premiumIndex", {}, {"binance": 10}
+
+
+def parse_binance_premium_index(data):
+    # [(symbol, mark price, predicted funding rate, next funding time ms)]; delivery contracts
+    # come back with an empty lastFundingRate and are skipped
+    entries = data if isinstance(data, list) else [data] if data else []
+    return [(e["symbol"], float(e["markPrice"]), float(e["lastFundingRate"]), int(e["nextFundingTime"]))
+            for e in entries if e.get("lastFundingRate") not in (None, "")]
+
+
+# === Bybit ===
+def bybit_funding_request(symbol, start_ms, end_ms, category="linear", limit=BYBIT_FUNDING_LIMIT):
+    params = {"category": category, "symbol": symbol, "startTime": start_ms, "endTime": end_ms, "limit": limit}
+    return "/v5/market/funding/history", params, {"bybit": 1}
+
+
+def parse_bybit_funding(data):
+    return [(int(e["fundingRateTimestamp"]), float(e["fundingRate"])) for e in data.get("result", {}).get("list", [])]
+
+
+def next_bybit_funding_end(page, limit=BYBIT_FUNDING_LIMIT):
+    # Bybit answers newest first, so pages walk backwards below the oldest row received
+    return min(t for t, _ in page) - 1 if len(page) >= limit else None
+
+
+def bybit_kline_requests(symbol, start_ms, end_ms, category="linear", interval="60", limit=BYBIT_KLINE_LIMIT):
+    return [
+        ("/v5/market/mark-price-kline",
+         {"category": category, "symbol": symbol, "interval": interval, "start": lo, "end": hi, "limit": limit},
+         {"bybit": 1})
+        for lo, hi in kline_windows(start_ms, end_ms, interval, limit)
+    ]
+
+
+def parse_bybit_klines(data):
+    return {int(k[0]): float(k[1]) for k in data.get("result", {}).get("list", [])}
+
+
+# === Blocking fetchers (Daily_Fund_Fetcher, scanner) ===
+def fetch(base_url, request):
+    path, params, weights = request
+    return get_client(base_url).get_json(path, params, weights)
+
+
+def binance_funding_history(symbol, start_ms, end_ms, base_url=BINANCE_FAPI):
+    # [(fundingTime ms, fundingRate)] oldest first
+    rows = []
+    cursor = start_ms
+    while cursor is not None and cursor < end_ms:
+        page = parse_binance_funding(fetch(base_url, binance_funding_request(symbol, cursor, end_ms)))
+        rows.extend(page)
+        cursor = next_binance_funding_start(page)
+    return rows
+
+
+def cached_mark_prices(venue, symbol, start_ms, end_ms, load_range, cache=price_cache):
+    # load_range(lo, hi) -> {open time: price} from the exchange; called only for uncached runs
+    if cache is None:
+        return load_range(start_ms, end_ms)
+    for lo, hi in cache.missing(venue, symbol, start_ms, end_ms):
+        cache.store(venue, symbol, lo, hi, load_range(lo, hi))
+    return cache.prices(venue, symbol, start_ms, end_ms)
+
+
+def binance_mark_price_klines(symbol, start_ms, end_ms, base_url=BINANCE_FAPI, cache=price_cache):
+    def load_range(lo, hi):
+        prices = {}
+        for request in binance_kline_requests(symbol, lo, hi):
+            prices.update(parse_binance_klines(fetch(base_url, request)))
+        return prices
+    return cached_mark_prices("binance", symbol, start_ms, end_ms, load_range, cache)
+
+
+def bybit_cache_venue(category):
+    return "bybit" if category == "linear" else f"bybit_{category}"
+
+
+# === Joining prices to funding rows ===
+def kline_range(funding_times, interval="1h"):
+    # Candle range that covers every funding row, plus one candle past the last in case its
+    # hour is missing and the next candle has to stand in (what a limit=1 request returned)
+    return floor_hour(min(funding_times)), floor_hour(max(funding_times)) + INTERVAL_MS[interval]
+
+
+def attach_mark_prices(funding_times, prices):
+    # Open price of the first candle starting at or after each funding time's hour; None if none
+    if not prices:
+        return [None] * len(funding_times)
+    open_times = np.array(sorted(prices), dtype=np.int64)
+    opens = [prices[t] for t in open_times]
+    rounded = np.array([floor_hour(t) for t in funding_times], dtype=np.int64)
+    idx = np.searchsorted(open_times, rounded, side="left")
+    return [opens[i] if i < len(opens) else None for i in idx]
+
+
+def with_prices(funding, prices):
+    # funding: [(time ms, rate)], prices: {open time: price} -> [{"fundingTime", "fundingRate", "price"}]
+    times = [t for t, _ in funding]
+    joined = attach_mark_prices(times, prices)
+    return [{"fundingTime": t, "fundingRate": rate, "price": price} for (t, rate), price in zip(funding, joined)]
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+# Persistent hourly mark prices per (venue, symbol), shared by every fetcher. Each series is an
+# append-only binary file of 16-byte records (hour open time ms int64, open price float64) in
+# data/price_cache/<venue>_<symbol>_1h.bin. A NaN price marks a past hour the exchange had no
+# candle for, so gaps aren't requested again either. Fetchers ask for the hours they still miss,
+# fetch only those ranges and store what came back; a rerun over cached hours sends nothing.
+# The first load in a process rewrites a file that holds superseded records or a torn tail.
+
+HOUR_MS = 60 * 60 * 1000
+record_dtype = np.dtype([("hour", "<i8"), ("price", "<f8")])
+
+cache_dir = os.environ.get(
+    "PRICE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "price_cache"))
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+class PriceCache:
+    def __init__(self, directory=cache_dir):
+        self.directory = directory
+        self._series = {}       # (venue, symbol) -> {hour ms: price}
+        self._lock = threading.Lock()
+
+    def path(self, venue, symbol):
+        return os.path.join(self.directory, f"{venue}_{symbol.lower()}_1h.bin")
+
+    def _load(self, venue, symbol):
+        key = (venue, symbol.upper())
+        series = self._series.get(key)
+        if series is None:
+            path = self.path(venue, symbol)
+            series = {}
+            if os.path.exists(path):
+                # A torn record at the end (killed mid-write) is ignored
+                size = os.path.getsize(path)
+                count = size // record_dtype.itemsize
+                records = np.fromfile(path, dtype=record_dtype, count=count)
+                series = dict(zip(records["hour"].tolist(), records["price"].tolist()))
+                # Superseded records or a torn tail: rewrite the file before anything is appended
+                # after them (appends past a torn record would be misaligned)
+                if len(series) < count or size % record_dtype.itemsize:
+                    self._compact(path, series)
+            self._series[key] = series
+        return series
+
+    def _compact(self, path, series):
+        # Rewrites a series file sorted, one record per hour; caller holds the lock
+        records = np.empty(len(series), dtype=record_dtype)
+        records["hour"] = sorted(series)
+        records["price"] = [series[h] for h in records["hour"].tolist()]
+        tmp_path = path + ".tmp"
+        records.tofile(tmp_path)
+        os.replace(tmp_path, path)
+
+    def missing(self, venue, symbol, start_ms, end_ms, now_ms=None):
+        # [(lo, hi)] runs of hours in [start_ms, end_ms] not cached yet; hours that haven't
+        # started can't have a candle and are left out
+        last = min(end_ms, now_ms if now_ms is not None else _now_ms())
+        with self._lock:
+            series = self._load(venue, symbol)
+            hours = [h for h in range(start_ms - start_ms % HOUR_MS, last + 1, HOUR_MS) if h not in series]
+        runs = []
+        for h in hours:
+            if runs and runs[-1][1] == h - HOUR_MS:
+                runs[-1][1] = h
+            else:
+                runs.append([h, h])
+        return [(lo, hi) for lo, hi in runs]
+
+    def store(self, venue, symbol, start_ms, end_ms, prices, now_ms=None):
+        # prices: {open time ms: open price} as fetched for [start_ms, end_ms]. Past hours of the
+        # range without a candle are stored as NaN; the current hour is left for a later fetch.
+        now_ms = now_ms if now_ms is not None else _now_ms()
+        with self._lock:
+            series = self._load(venue, symbol)
+            new = {h: p for h, p in prices.items() if h % HOUR_MS == 0 and series.get(h) != p}
+            for h in range(start_ms - start_ms % HOUR_MS, min(end_ms, now_ms - HOUR_MS) + 1, HOUR_MS):
+                if h not in prices and h not in series:
+                    new[h] = float("nan")
+            if not new:
+                return
+            records = np.empty(len(new), dtype=record_dtype)
+            records["hour"] = sorted(new)
+            records["price"] = [new[h] for h in records["hour"].tolist()]
+            os.makedirs(self.directory, exist_ok=True)
+            fd = os.open(self.path(venue, symbol), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, records.tobytes())
+            finally:
+                os.close(fd)
+            series.update(new)
+
+    def prices(self, venue, symbol, start_ms, end_ms):
+        # {open time ms: price} of the cached candles in [start_ms, end_ms]
+        with self._lock:
+            series = self._load(venue, symbol)
+            return {h: series[h] for h in range(start_ms - start_ms % HOUR_MS, end_ms + 1, HOUR_MS)
+                    if h in series and series[h] == series[h]}
+
+
+# One cache per process so the downloader and the blocking fetchers share what's loaded
+price_cache = PriceCache()
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+# Request-weight budgets as (capacity, refill per second), at ~80% of the documented IP limits
+# so the live bot still has headroom while a history download is running.
+#   Binance USDⓈ-M: 2400 weight / minute; fundingRate also shares 500 requests / 5 minutes
+#   Bybit v5: 600 requests / 5 seconds
+rate_limits = {
+    "binance": (1920, 1920 / 60),
+    "binance_funding": (400, 400 / 300),
+    "bybit": (480, 480 / 5),
+}
+
+
+class TokenBucket:
+    # Classic token bucket: `capacity` tokens, refilled continuously at `rate` per second.
+    # Usable from threads (wait) and from asyncio tasks (acquire); both share the same state.
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, weight):
+        # Takes `weight` tokens and returns 0, or returns how long until they'd be available
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= weight:
+                self.tokens -= weight
+                return 0.0
+            return (weight - self.tokens) / self.rate
+
+    def wait(self, weight=1):
+        delay = self._take(weight)
+        while delay > 0:
+            time.sleep(delay)
+            delay = self._take(weight)
+
+    async def acquire(self, weight=1):
+        delay = self._take(weight)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._take(weight)
+
+
+# One bucket per budget for the whole process, so every fetcher draws from the same budget
+buckets = {name: TokenBucket(capacity, rate) for name, (capacity, rate) in rate_limits.items()}
+
+
+def configure(limits):
+    # Replaces budgets in place, e.g. {name: (float("inf"), 1)} to lift them for offline replays
+    for name, (capacity, rate) in limits.items():
+        buckets[name] = TokenBucket(capacity, rate)
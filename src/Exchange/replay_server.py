@@ -0,0 +1,238 @@
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+from market_data import HOUR_MS, floor_hour
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Storage"))
+from columnar import sniff_decimal
+
+# Local HTTP server that replays stored funding CSVs (data/<venue>_<symbol>_funding.csv) in the
+# Binance and Bybit API formats the adapters speak: funding history plus 1h mark-price candles,
+# one candle per stored funding hour with the stored price as its open, and Binance premiumIndex
+# for every stored symbol at a settable replay time. Pointing the downloader or the scanner at it
+# exercises the whole ingestion pipeline offline, for tests and throughput benchmarks.
+
+FILE_PATTERN = re.compile(r"^(?P<venue>[a-z]+)_(?P<symbol>[a-z0-9]+)_funding\.csv$")
+
+
+class ReplaySeries:
+    def __init__(self, path):
+        df = pd.read_csv(path, decimal=sniff_decimal(path), parse_dates=["timestamp"])
+        df = df.dropna(subset=["timestamp"]).sort_values("timestamp", kind="stable")
+        # Stored timestamps are naive local time (datetime.fromtimestamp when downloaded)
+        ms = np.array([round(ts.timestamp() * 1000) for ts in df["timestamp"]], dtype=np.int64)
+        self.times, first = np.unique(ms, return_index=True)
+        self.rates = df["fundingRate"].to_numpy(dtype=float)[first]
+
+        hours = np.array([floor_hour(t) for t in self.times], dtype=np.int64)
+        prices = df["price"].to_numpy(dtype=float)[first]
+        valid = ~np.isnan(prices)
+        self.kline_times, kfirst = np.unique(hours[valid], return_index=True)
+        self.kline_prices = prices[valid][kfirst]
+
+    @staticmethod
+    def _range(times, start, end):
+        return np.searchsorted(times, start, side="left"), np.searchsorted(times, end, side="right")
+
+    def funding(self, start, end):
+        lo, hi = self._range(self.times, start, end)
+        return self.times[lo:hi], self.rates[lo:hi]
+
+    def klines(self, start, end):
+        lo, hi = self._range(self.kline_times, start, end)
+        return self.kline_times[lo:hi], self.kline_prices[lo:hi]
+
+    def premium_index(self, now):
+        # (next funding time, its rate as the prediction, last mark price) at replay time `now`;
+        # past the end of the data the last rate is predicted for one more 8h period
+        i = np.searchsorted(self.times, now, side="right")
+        next_time, rate = (self.times[i], self.rates[i]) if i < len(self.times) else (self.times[-1] + 8 * HOUR_MS, self.rates[-1])
+        k = max(np.searchsorted(self.kline_times, now, side="right") - 1, 0)
+        price = self.kline_prices[k] if len(self.kline_prices) else float("nan")
+        return int(next_time), float(rate), float(price)
+
+
+def load_series(data_dir):
+    # {(venue, SYMBOL): ReplaySeries} for every funding CSV in data_dir
+    series = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, "*_funding.csv"))):
+        match = FILE_PATTERN.match(os.path.basename(path))
+        if match:
+            series[(match["venue"], match["symbol"].upper())] = ReplaySeries(path)
+    return series
+
+
+def _int(params, name, default):
+    value = params.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+# === Binance USDⓈ-M formats ===
+def binance_funding(series, params):
+    limit = min(_int(params, "limit", 100), 1000)
+    start = _int(params, "startTime", None)
+    end = _int(params, "endTime", 2 ** 62)
+    times, rates = series.funding(start if start is not None else 0, end)
+    # Without startTime Binance returns the most recent `limit` rows
+    times, rates = (times[:limit], rates[:limit]) if start is not None else (times[-limit:], rates[-limit:])
+    symbol = params["symbol"]
+    return [{"symbol": symbol, "fundingTime": int(t), "fundingRate": repr(float(r))} for t, r in zip(times, rates)]
+
+
+def binance_klines(series, params):
+    limit = min(_int(params, "limit", 500), 1500)
+    times, prices = series.klines(_int(params, "startTime", 0), _int(params, "endTime", 2 ** 62))
+    rows = []
+    for t, p in zip(times[:limit], prices[:limit]):
+        price = repr(float(p))
+        rows.append([int(t), price, price, price, price, "0", int(t) + HOUR_MS - 1, "0", 0, "0", "0", "0"])
+    return rows
+
+
+# === Bybit v5 formats (lists come newest first) ===
+def _bybit_response(params, rows):
+    return {"retCode": 0, "retMsg": "OK",
+            "result": {"category": params.get("category", "linear"), "symbol": params["symbol"], "list": rows},
+            "time": int(time.time() * 1000)}
+
+
+def bybit_funding(series, params):
+    limit = min(_int(params, "limit", 200), 200)
+    times, rates = series.funding(_int(params, "startTime", 0), _int(params, "endTime", 2 ** 62))
+    rows = [{"symbol": params["symbol"], "fundingRate": repr(float(r)), "fundingRateTimestamp": str(int(t))}
+            for t, r in zip(times[::-1][:limit], rates[::-1][:limit])]
+    return _bybit_response(params, rows)
+
+
+def bybit_klines(series, params):
+    limit = min(_int(params, "limit", 200), 1000)
+    times, prices = series.klines(_int(params, "start", 0), _int(params, "end", 2 ** 62))
+    rows = []
+    for t, p in zip(times[::-1][:limit], prices[::-1][:limit]):
+        price = repr(float(p))
+        rows.append([str(int(t)), price, price, price, price])
+    return _bybit_response(params, rows)
+
+
+def binance_premium_index(server, params):
+    # All Binance series at the server's replay time (by default just before the last stored
+    # funding); with a symbol, a single object like the real endpoint
+    now = server.replay_time_ms
+    symbol = params.get("symbol", "").upper()
+    rows = []
+    for (venue, name), series in sorted(server.series.items()):
+        if venue != "binance" or (symbol and name != symbol):
+            continue
+        next_time, rate, price = series.premium_index(series.times[-1] - 1 if now is None else now)
+        rows.append({"symbol": name, "markPrice": repr(price), "indexPrice": repr(price),
+                     "estimatedSettlePrice": repr(price), "lastFundingRate": repr(rate),
+                     "interestRate": "0.00010000", "nextFundingTime": next_time,
+                     "time": int(time.time() * 1000) if now is None else int(now)})
+    return rows[0] if symbol and rows else rows
+
+
+# path -> handler(server, params) for endpoints that answer for every symbol at once
+universe_routes = {
+    "/fapi/v1/premiumIndex": binance_premium_index,
+}
+
+# path -> (venue, handler)
+routes = {
+    "/fapi/v1/fundingRate": ("binance", binance_funding),
+    "/fapi/v1/markPriceKlines": ("binance", binance_klines),
+    "/v5/market/funding/history": ("bybit", bybit_funding),
+    "/v5/market/mark-price-kline": ("bybit", bybit_klines),
+}
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.server.count(url.path)
+
+        if url.path in universe_routes:
+            self._send(200, universe_routes[url.path](self.server, params))
+            return
+        route = routes.get(url.path)
+        if route is None:
+            self._send(404, {"code": -1, "msg": "Not found"})
+            return
+        venue, handler = route
+        series = self.server.series.get((venue, params.get("symbol", "").upper()))
+        if series is None:
+            if venue == "bybit":
+                self._send(200, {"retCode": 10001, "retMsg": "params error: symbol invalid", "result": {}})
+            else:
+                self._send(400, {"code": -1121, "msg": "Invalid symbol."})
+            return
+        self._send(200, handler(series, params))
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, data_dir, host="127.0.0.1", port=0, latency=0.0):
+        super().__init__((host, port), ReplayHandler)
+        self.series = load_series(data_dir)
+        self.latency = latency
+        self.replay_time_ms = None   # "now" for premiumIndex; None = just before the last stored funding
+        self.request_counts = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, path):
+        with self._lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+
+def start_replay_server(data_dir, host="127.0.0.1", port=0, latency=0.0):
+    # Serves in a daemon thread; port=0 picks a free port (see server.base_url). Stop with shutdown().
+    server = ReplayServer(data_dir, host, port, latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay stored funding CSVs as a local Binance/Bybit API")
+    parser.add_argument("--data-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "BackTesting", "data"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    args = parser.parse_args()
+
+    server = ReplayServer(args.data_dir, args.host, args.port, args.latency)
+    for (venue, symbol), s in sorted(server.series.items()):
+        print(f"{venue:<8} {symbol:<10} {len(s.times)} funding rows")
+    print(f"Replaying on {server.base_url} (set BINANCE_FAPI_URL / BYBIT_API_URL to it)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
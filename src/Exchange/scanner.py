@@ -0,0 +1,142 @@
+import argparse
+import os
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from market_data import BINANCE_FAPI, fetch, binance_premium_index_request, parse_binance_premium_index
+from http_client import print_latency_report
+
+# Funding opportunity scanner over every Binance USDⓈ-M perpetual. One premiumIndex request
+# returns the predicted funding rate, mark price and next funding time of all contracts; each
+# refresh scores them with the bot's entry rule and re-ranks an in-memory table.
+#
+# Entry rule (Bot.py / FundingArbitrageBacktest): open when the funding income of one period
+# covers the entry threshold, i.e. |rate| * notional >= one-side fee * notional * entry_fee_factor,
+# and the average of the last 3 funding periods has the same sign as the current rate.
+# Notional cancels out, so a symbol's edge is |rate| - position_fee * entry_fee_factor per period.
+
+# Same factors as StrategyConfig.entry_fee_factor; Bot.py opens on the full round trip
+entry_fee_factors = {"entry_only": 1.0, "half_round": 1.0, "round_trip": 2.0}
+
+table_columns = ["symbol", "markPrice", "fundingRate", "avgFunding", "periods", "nextFundingTime",
+                 "direction", "edge", "eligible"]
+
+
+class FundingScanner:
+    def __init__(self, position_fee=0.0002, entry_fee_type="round_trip", short_only=False,
+                 quote="USDT", window=3, base_url=BINANCE_FAPI):
+        self.position_fee = position_fee
+        self.entry_fee_factor = entry_fee_factors.get(entry_fee_type, 2.0)
+        self.short_only = short_only
+        self.quote = quote
+        self.window = window
+        self.base_url = base_url
+        # symbol -> deque of [next funding time ms, rate]: one entry per funding period, the
+        # newest holding the live prediction until its funding time passes
+        self.periods = {}
+        self.marks = {}
+        self.table = pd.DataFrame(columns=table_columns)
+        self.refreshed_at = None
+
+    @property
+    def threshold(self):
+        return self.position_fee * self.entry_fee_factor
+
+    def update(self, entries):
+        # entries: parse_binance_premium_index output. Returns the re-ranked table.
+        for symbol, mark_price, rate, next_funding in entries:
+            if not symbol.endswith(self.quote):
+                continue
+            history = self.periods.get(symbol)
+            if history is None:
+                history = self.periods[symbol] = deque(maxlen=self.window)
+            if history and history[-1][0] == next_funding:
+                history[-1][1] = rate
+            elif not history or next_funding > history[-1][0]:
+                # Funding time moved on: the previous prediction settled, a new period starts
+                history.append([next_funding, rate])
+            self.marks[symbol] = mark_price
+        self.table = self._rank()
+        return self.table
+
+    def _rank(self):
+        symbols = list(self.periods)
+        if not symbols:
+            return pd.DataFrame(columns=table_columns)
+        n = len(symbols)
+        rates = np.empty(n)
+        avgs = np.empty(n)
+        counts = np.empty(n, dtype=np.int64)
+        next_times = np.empty(n, dtype=np.int64)
+        for i, symbol in enumerate(symbols):
+            history = self.periods[symbol]
+            next_times[i], rates[i] = history[-1]
+            avgs[i] = sum(rate for _, rate in history) / len(history)
+            counts[i] = len(history)
+
+        edge = np.abs(rates) - self.threshold
+        eligible = (edge >= 0) & (avgs * rates > 0)
+        if self.short_only:
+            eligible &= rates > 0
+        table = pd.DataFrame({
+            "symbol": symbols,
+            "markPrice": [self.marks[s] for s in symbols],
+            "fundingRate": rates,
+            "avgFunding": avgs,
+            "periods": counts,
+            "nextFundingTime": pd.to_datetime(next_times, unit="ms", utc=True),
+            "direction": np.where(rates < 0, "long", "short"),
+            "edge": edge,
+            "eligible": eligible,
+        })
+        return table.sort_values(["eligible", "edge"], ascending=False, kind="stable").reset_index(drop=True)
+
+    def refresh(self):
+        # One request for the whole universe
+        entries = parse_binance_premium_index(fetch(self.base_url, binance_premium_index_request()))
+        self.refreshed_at = time.time()
+        return self.update(entries)
+
+    def top(self, n=10, eligible_only=True):
+        table = self.table[self.table["eligible"]] if eligible_only else self.table
+        return table.head(n)
+
+    def poll(self, interval=60, iterations=None, on_refresh=None):
+        # Refreshes every `interval` seconds; on_refresh(table) after each one
+        count = 0
+        while iterations is None or count < iterations:
+            started = time.monotonic()
+            table = self.refresh()
+            if on_refresh is not None:
+                on_refresh(table)
+            count += 1
+            if iterations is None or count < iterations:
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rank funding opportunities across all Binance USDⓈ-M perpetuals")
+    parser.add_argument("--fee", type=float, default=0.0002, help="One-side maker fee")
+    parser.add_argument("--entry-fee-type", choices=sorted(entry_fee_factors), default="round_trip")
+    parser.add_argument("--short-only", action="store_true")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--all", action="store_true", help="Also list symbols that don't pass the entry rule")
+    parser.add_argument("--interval", type=float, default=60, help="Seconds between refreshes")
+    parser.add_argument("--iterations", type=int, default=1, help="Refreshes to run (0 = until interrupted)")
+    args = parser.parse_args()
+
+    scanner = FundingScanner(args.fee, args.entry_fee_type, args.short_only,
+                             base_url=os.environ.get("BINANCE_FAPI_URL", BINANCE_FAPI))
+
+    def show(table):
+        print(f"\n{len(table)} symbols, {int(table['eligible'].sum())} pass the entry rule "
+              f"(|rate| >= {scanner.threshold:.4%} per period)")
+        print(scanner.top(args.top, eligible_only=not args.all).to_string(index=False))
+
+    try:
+        scanner.poll(args.interval, args.iterations or None, show)
+    except KeyboardInterrupt:
+        pass
+    print_latency_report()
@@ -0,0 +1,160 @@
+import csv
+import json
+import os
+import tempfile
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+# Typed columnar twins of the CSV data files. Every <name>.csv can have a <name>.npz next to it
+# holding the same frame column by column: timestamps as int64 epoch nanoseconds of the stored
+# (naive) wall-clock value, numbers as float64/int64, text dictionary-encoded. Loading one is a
+# few array reads instead of a locale-aware text parse.
+#
+# The CSVs stay the files every fetcher appends to and every tool can open. load_frame reads the
+# twin when it is at least as new as its CSV; otherwise it parses the CSV and, if the tree has
+# been converted (the twin exists), refreshes the twin for the next reader. save_frame writes the
+# CSV and keeps an existing twin in step. convert_data.py creates the twins for a whole tree.
+
+format_version = 1
+compress_twins = False     # zlib members: ~3x smaller twins, ~2x slower loads
+
+
+def columnar_path(csv_path):
+    root, _ = os.path.splitext(csv_path)
+    return root + ".npz"
+
+
+def sniff_decimal(csv_file):
+    # Binance files are written with decimal=',' (quoted "0,0001"), the Bybit fetcher with '.'
+    with open(csv_file, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        first_row = next(reader, None)
+    if first_row is None:
+        return ","
+    return "," if any("," in field for field in first_row[1:]) else "."
+
+
+def read_csv_frame(path, decimal=None):
+    with open(path, newline="") as f:
+        header = next(csv.reader(f), [])
+    parse_dates = ["timestamp"] if "timestamp" in header else False
+    return pd.read_csv(path, decimal=decimal or sniff_decimal(path), parse_dates=parse_dates)
+
+
+def read_appended(path, offset, decimal=None):
+    # Rows written past byte `offset` (a fetcher's append), parsed under the file's header line;
+    # None when nothing but whitespace follows
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(offset)
+        tail = f.read()
+    if not tail.strip():
+        return None
+    parse_dates = ["timestamp"] if b"timestamp" in header.strip().split(b",") else False
+    return pd.read_csv(BytesIO(header + tail), decimal=decimal or sniff_decimal(path), parse_dates=parse_dates)
+
+
+def _encode(column):
+    # (kind, values, extra array or None)
+    if isinstance(column.dtype, pd.DatetimeTZDtype):
+        values = column.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+        return "datetime_utc", values.view(np.int64), None
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return "datetime", column.to_numpy(dtype="datetime64[ns]").view(np.int64), None
+    if pd.api.types.is_bool_dtype(column):
+        return "bool", column.to_numpy(dtype=bool), None
+    if pd.api.types.is_integer_dtype(column):
+        return "int", column.to_numpy(dtype=np.int64), None
+    if pd.api.types.is_float_dtype(column):
+        return "float", column.to_numpy(dtype=np.float64), None
+    # Object columns built from records (None next to numbers) get the type a CSV read gives them
+    inferred = pd.api.types.infer_dtype(column, skipna=True)
+    if inferred in ("integer", "floating", "mixed-integer-float", "decimal", "empty"):
+        if inferred == "integer" and not column.isna().any():
+            return "int", column.to_numpy(dtype=np.int64), None
+        return "float", pd.to_numeric(column).to_numpy(dtype=np.float64), None
+    if inferred in ("datetime", "datetime64"):
+        return _encode(pd.to_datetime(column))
+    # Text is dictionary-encoded (few distinct values: position, source...): int32 codes into
+    # a unicode array of the distinct values, -1 for missing
+    codes, uniques = pd.factorize(column.astype(object), use_na_sentinel=True)
+    return "str", codes.astype(np.int32), np.asarray([str(u) for u in uniques], dtype=str)
+
+
+def _decode(kind, values, extra):
+    if kind == "datetime":
+        return values.view("datetime64[ns]")
+    if kind == "datetime_utc":
+        return pd.DatetimeIndex(values.view("datetime64[ns]")).tz_localize("UTC")
+    if kind == "str":
+        lookup = np.append(extra.astype(object), np.nan)
+        return lookup[values]
+    return values
+
+
+def write_table(df, path, compress=None):
+    # Atomic: written to a temp file in the same folder, then renamed over `path`
+    compress = compress_twins if compress is None else compress
+    arrays = {}
+    columns = []
+    for i, name in enumerate(df.columns):
+        kind, values, extra = _encode(df[name])
+        arrays[f"c{i}"] = values
+        if extra is not None:
+            arrays[f"x{i}"] = extra
+        columns.append([str(name), kind])
+    arrays["meta"] = np.array(json.dumps({"version": format_version, "rows": len(df), "columns": columns}))
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            (np.savez_compressed if compress else np.savez)(f, **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_table(path, columns=None):
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+        frame = {}
+        for i, (name, kind) in enumerate(meta["columns"]):
+            if columns is not None and name not in columns:
+                continue
+            extra = data[f"x{i}"] if f"x{i}" in data.files else None
+            frame[name] = _decode(kind, data[f"c{i}"], extra)
+    return pd.DataFrame(frame, index=pd.RangeIndex(meta["rows"]))
+
+
+def twin_is_fresh(csv_path):
+    twin = columnar_path(csv_path)
+    if not os.path.exists(twin):
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(twin) >= os.path.getmtime(csv_path)
+
+
+def load_frame(csv_path, decimal=None):
+    # The frame pd.read_csv(csv_path, decimal=..., parse_dates=["timestamp"]) would give
+    if twin_is_fresh(csv_path):
+        return read_table(columnar_path(csv_path))
+    df = read_csv_frame(csv_path, decimal)
+    if os.path.exists(columnar_path(csv_path)):
+        try:
+            write_table(df, columnar_path(csv_path))
+        except OSError:
+            pass
+    return df
+
+
+def save_frame(df, csv_path, decimal=","):
+    # Writes the CSV as the scripts always have, and its twin when the tree has been converted
+    df.to_csv(csv_path, index=False, decimal=decimal)
+    if os.path.exists(columnar_path(csv_path)):
+        write_table(df.reset_index(drop=True), columnar_path(csv_path))
@@ -0,0 +1,79 @@
+import argparse
+import glob
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import columnar
+from columnar import columnar_path, read_csv_frame, write_table, read_table
+
+# One-shot conversion of a data tree: writes the .npz twin of every CSV, checks it loads back to
+# the same frame, and reports disk size and load time against the CSV. From then on load_frame /
+# save_frame keep the twins current.
+
+root_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+default_dirs = [os.path.join(root_dir, "data"), os.path.join(root_dir, "src", "BackTesting", "data")]
+
+
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def convert_file(csv_path, repeat=3):
+    df = read_csv_frame(csv_path)
+    twin = columnar_path(csv_path)
+    write_table(df, twin)
+    loaded = read_table(twin)
+    same = loaded.equals(df) and list(loaded.dtypes) == list(df.dtypes)
+    return {
+        "path": os.path.relpath(csv_path, root_dir),
+        "rows": len(df),
+        "csv_bytes": os.path.getsize(csv_path),
+        "npz_bytes": os.path.getsize(twin),
+        "csv_load_s": best_time(lambda: read_csv_frame(csv_path), repeat),
+        "npz_load_s": best_time(lambda: read_table(twin), repeat),
+        "identical": bool(same),
+    }
+
+
+def convert_tree(dirs, repeat=3):
+    files = sorted({p for d in dirs for p in glob.glob(os.path.join(d, "**", "*.csv"), recursive=True)})
+    return [convert_file(path, repeat) for path in files]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write typed columnar (.npz) twins of every CSV in the data folders")
+    parser.add_argument("dirs", nargs="*", default=default_dirs)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed loads per file (best is kept)")
+    parser.add_argument("--compress", action="store_true", help="Smaller twins, slower loads")
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+    columnar.compress_twins = args.compress
+
+    report = convert_tree(args.dirs, args.repeat)
+    for r in report:
+        status = "✅" if r["identical"] else "❌"
+        print(f"{status} {r['path']:<70} {r['rows']:>7} rows  {r['csv_bytes'] / 1024:>8.0f} KB -> {r['npz_bytes'] / 1024:>6.0f} KB  "
+              f"load {r['csv_load_s'] * 1000:>7.1f} ms -> {r['npz_load_s'] * 1000:>5.1f} ms")
+
+    csv_bytes = sum(r["csv_bytes"] for r in report)
+    npz_bytes = sum(r["npz_bytes"] for r in report)
+    csv_load = sum(r["csv_load_s"] for r in report)
+    npz_load = sum(r["npz_load_s"] for r in report)
+    if report:
+        print(f"\n{len(report)} files: {csv_bytes / 1e6:.1f} MB -> {npz_bytes / 1e6:.1f} MB ({csv_bytes / max(npz_bytes, 1):.1f}x smaller), "
+              f"load {csv_load:.2f}s -> {npz_load:.2f}s ({csv_load / max(npz_load, 1e-9):.1f}x faster)")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"created_at": datetime.now(tz=timezone.utc).isoformat(), "files": report}, f, indent=2)
+        print(f"Report saved to {args.output}")
+    raise SystemExit(0 if all(r["identical"] for r in report) else 1)
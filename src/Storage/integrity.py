@@ -0,0 +1,306 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from columnar import load_frame, read_appended
+
+# Integrity check of a funding series against its funding grid. Every row is mapped to the
+# nearest expected funding slot (interval-spaced, anchored on the series' dominant phase) in one
+# vectorized pass, which finds:
+#   missing slots      grid slots between the first and last row with no row
+#   duplicate rows     exact repeats of an earlier row
+#   conflicting slots  slots holding more than one distinct row
+#   out of order       rows older than the row before them (Bybit pages come newest first)
+#   drifted rows       stamps off their slot by more than `tolerance` after whole-hour shifts
+# Whole-hour offsets (local-time files across DST, re-stamped backups) still land on the right
+# slot; they are counted as `shifted`, not as problems.
+#
+# The result is persisted next to the CSV as <name>.slots.npz: the row offset of every slot
+# (-1 when missing), the problem rows and the per-row hashes and per-slot counts needed to add
+# rows later, keyed to the CSV's size, mtime and last bytes. check_series reuses it while the
+# CSV is unchanged and, when a fetcher has only appended, checks just the new rows against it,
+# so fetchers and backtests can call it before every run at a cost that doesn't grow with the file.
+
+HOUR_NS = 60 * 60 * 10**9
+default_interval = 8 * HOUR_NS
+default_tolerance = 60 * 10**9      # 1 minute; Binance stamps are a few ms late
+format_version = 2
+tail_bytes = 64
+
+
+def slots_path(csv_path):
+    root, _ = os.path.splitext(csv_path)
+    return root + ".slots.npz"
+
+
+def _row_hashes(frame):
+    # One hash per row; numbers hashed as float64 so a tail parsed on its own (where a price
+    # column can come out as int64) hashes like the same rows in the full file
+    columns = {name: (frame[name].astype(np.float64) if pd.api.types.is_numeric_dtype(frame[name])
+                      and not pd.api.types.is_bool_dtype(frame[name]) else frame[name]) for name in frame}
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+
+
+def _place(ts, phase, interval):
+    # (slot, whole-hour shift, drift) of every stamp on the grid anchored at `phase`
+    slot = (ts - phase + interval // 2) // interval
+    residual = ts - (slot * interval + phase)
+    shift = np.round(residual / HOUR_NS).astype(np.int64)
+    return slot, shift, residual - shift * HOUR_NS
+
+
+def _report(arrays, rows, first_ns, last_ns, interval, max_drift_ms, shifted):
+    report = {
+        "rows": rows,
+        "first": str(pd.Timestamp(int(first_ns))),
+        "last": str(pd.Timestamp(int(last_ns))),
+        "interval_h": interval / HOUR_NS,
+        "slots": len(arrays["offsets"]),
+        "missing_slots": len(arrays["missing"]),
+        "duplicate_rows": len(arrays["duplicates"]),
+        "conflicting_slots": len(arrays["conflicts"]),
+        "out_of_order": len(arrays["out_of_order"]),
+        "drifted": len(arrays["drifted"]),
+        "max_drift_ms": max_drift_ms,
+        "shifted": shifted,
+    }
+    report["ok"] = not (report["missing_slots"] or report["duplicate_rows"] or report["conflicting_slots"]
+                        or report["out_of_order"] or report["drifted"])
+    return report
+
+
+def validate(frame, interval=default_interval, tolerance=default_tolerance):
+    # (report dict, arrays dict) for a frame with a `timestamp` column, rows in stored order
+    ts = frame["timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    n = len(ts)
+    empty = np.empty(0, dtype=np.int64)
+    if n == 0:
+        report = {"rows": 0, "slots": 0, "missing_slots": 0, "duplicate_rows": 0, "conflicting_slots": 0,
+                  "out_of_order": 0, "drifted": 0, "max_drift_ms": 0.0, "shifted": 0, "ok": True}
+        return report, {"offsets": empty, "missing": empty, "duplicates": empty, "conflicts": empty,
+                        "out_of_order": empty, "drifted": empty, "first_slot": 0, "phase": 0}
+
+    # Grid phase: most common offset inside the interval, taken on the whole hour
+    hours = (ts + HOUR_NS // 2) // HOUR_NS
+    phase_counts = np.bincount(hours % (interval // HOUR_NS), minlength=interval // HOUR_NS)
+    phase = int(phase_counts.argmax()) * HOUR_NS
+    slot, shift, drift = _place(ts, phase, interval)
+    drifted = np.flatnonzero(np.abs(drift) > tolerance)
+
+    out_of_order = np.flatnonzero(ts[1:] < ts[:-1]) + 1
+    hashes = _row_hashes(frame)
+    duplicated = pd.Series(hashes).duplicated().to_numpy()
+    duplicates = np.flatnonzero(duplicated)
+
+    first_slot = int(slot.min())
+    local = slot - first_slot
+    span = int(local.max()) + 1
+    distinct = np.bincount(local[~duplicated], minlength=span)
+    missing = np.flatnonzero(np.bincount(local, minlength=span) == 0)
+    conflicts = np.flatnonzero(distinct > 1)
+
+    # Row offset of every slot: its first row in file order
+    offsets = np.full(span, n, dtype=np.int64)
+    np.minimum.at(offsets, local, np.arange(n, dtype=np.int64))
+    offsets[offsets == n] = -1
+
+    # hashes, distinct, phase_counts and last_row are what extend() needs to add rows later
+    arrays = {"offsets": offsets, "missing": missing, "duplicates": duplicates, "conflicts": conflicts,
+              "out_of_order": out_of_order, "drifted": drifted, "first_slot": first_slot, "phase": phase,
+              "hashes": hashes, "distinct": distinct, "phase_counts": phase_counts, "last_row": int(ts[-1])}
+    report = _report(arrays, n, ts.min(), ts.max(), interval, float(np.abs(drift).max()) / 1e6,
+                     int(np.count_nonzero(shift)))
+    return report, arrays
+
+
+def extend(report, arrays, frame, interval=default_interval, tolerance=default_tolerance):
+    # (report, arrays) of the series with `frame`'s rows appended, from the saved arrays and the
+    # new rows alone. None when validate has to run on the whole series instead: an empty
+    # series, new rows that move the grid phase, or rows older than the first slot.
+    ts = frame["timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    old_rows = report["rows"]
+    if not len(ts):
+        return report, arrays
+    if not old_rows or "hashes" not in arrays:
+        return None
+    hours = (ts + HOUR_NS // 2) // HOUR_NS
+    phase_counts = arrays["phase_counts"] + np.bincount(hours % (interval // HOUR_NS), minlength=interval // HOUR_NS)
+    phase = int(arrays["phase"])
+    if int(phase_counts.argmax()) * HOUR_NS != phase:
+        return None
+    slot, shift, drift = _place(ts, phase, interval)
+    first_slot = int(arrays["first_slot"])
+    if int(slot.min()) < first_slot:
+        return None
+
+    rows = np.arange(old_rows, old_rows + len(ts), dtype=np.int64)
+    local = slot - first_slot
+    span = max(len(arrays["offsets"]), int(local.max()) + 1)
+    offsets = np.concatenate([arrays["offsets"], np.full(span - len(arrays["offsets"]), -1, dtype=np.int64)])
+    distinct = np.concatenate([arrays["distinct"], np.zeros(span - len(arrays["distinct"]), dtype=np.int64)])
+
+    hashes = _row_hashes(frame)
+    duplicated = pd.Series(hashes).duplicated().to_numpy() | np.isin(hashes, arrays["hashes"])
+    np.add.at(distinct, local[~duplicated], 1)
+
+    # Slots still empty take their first new row
+    first_new = np.full(span, rows[-1] + 1, dtype=np.int64)
+    np.minimum.at(first_new, local, rows)
+    filled = (offsets == -1) & (first_new <= rows[-1])
+    offsets[filled] = first_new[filled]
+
+    previous = np.concatenate([[int(arrays["last_row"])], ts[:-1]])
+    extended = {
+        "offsets": offsets,
+        "missing": np.flatnonzero(offsets == -1),
+        "duplicates": np.concatenate([arrays["duplicates"], rows[duplicated]]),
+        "conflicts": np.flatnonzero(distinct > 1),
+        "out_of_order": np.concatenate([arrays["out_of_order"], rows[ts < previous]]),
+        "drifted": np.concatenate([arrays["drifted"], rows[np.abs(drift) > tolerance]]),
+        "first_slot": first_slot, "phase": phase,
+        "hashes": np.concatenate([arrays["hashes"], hashes]), "distinct": distinct,
+        "phase_counts": phase_counts, "last_row": int(ts[-1]),
+    }
+    report = _report(extended, old_rows + len(ts), min(pd.Timestamp(report["first"]).value, ts.min()),
+                     max(pd.Timestamp(report["last"]).value, ts.max()), interval,
+                     max(report["max_drift_ms"], float(np.abs(drift).max()) / 1e6),
+                     report["shifted"] + int(np.count_nonzero(shift)))
+    return report, extended
+
+
+class SlotIndex:
+    def __init__(self, report, arrays, interval=default_interval):
+        self.report = report
+        self.interval = interval
+        self.first_slot = int(arrays["first_slot"])
+        self.phase = int(arrays["phase"])
+        self.offsets = arrays["offsets"]
+        self.missing = arrays["missing"]
+        self.duplicates = arrays["duplicates"]
+        self.conflicts = arrays["conflicts"]
+        self.out_of_order = arrays["out_of_order"]
+        self.drifted = arrays["drifted"]
+
+    def slot_time(self, slots):
+        # Grid timestamps of slot positions (as stored offsets count them)
+        ns = (np.asarray(slots, dtype=np.int64) + self.first_slot) * self.interval + self.phase
+        return pd.to_datetime(ns)
+
+    def summary(self):
+        r = self.report
+        if r["ok"]:
+            return f"{r['rows']} rows, {r['slots']} slots, no gaps, duplicates or ordering problems"
+        parts = [f"{r[key]} {label}" for key, label in (
+            ("missing_slots", "missing slots"), ("duplicate_rows", "duplicate rows"),
+            ("conflicting_slots", "conflicting slots"), ("out_of_order", "out-of-order rows"),
+            ("drifted", "drifted rows")) if r[key]]
+        return f"{r['rows']} rows: " + ", ".join(parts)
+
+
+def _fingerprint(csv_path):
+    stat = os.stat(csv_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _tail(csv_path, size):
+    # Hex of the file's last bytes up to `size`: unchanged when the CSV has only been appended to
+    with open(csv_path, "rb") as f:
+        f.seek(max(size - tail_bytes, 0))
+        return f.read(min(size, tail_bytes)).hex()
+
+
+def _save(csv_path, report, arrays, interval, tolerance):
+    source = _fingerprint(csv_path)
+    meta = {"version": format_version, "source": source, "tail": _tail(csv_path, source[0]),
+            "interval": interval, "tolerance": tolerance, "report": report}
+    path = slots_path(csv_path)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return SlotIndex(report, arrays, interval)
+
+
+def build_index(csv_path, interval=default_interval, tolerance=default_tolerance):
+    report, arrays = validate(load_frame(csv_path), interval, tolerance)
+    return _save(csv_path, report, arrays, interval, tolerance)
+
+
+def check_series(csv_path, interval=default_interval, tolerance=default_tolerance):
+    # SlotIndex of the CSV: the persisted index while the CSV is unchanged, extended with just
+    # the appended rows when it only grew, rebuilt from the whole file otherwise
+    path = slots_path(csv_path)
+    if os.path.exists(path):
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if (meta["version"] == format_version and meta["interval"] == interval
+                        and meta["tolerance"] == tolerance):
+                    arrays = {k: data[k] for k in data.files if k != "meta"}
+                    if meta["source"] == _fingerprint(csv_path):
+                        return SlotIndex(meta["report"], arrays, interval)
+                    size = meta["source"][0]
+                    if size < os.path.getsize(csv_path) and meta["tail"] == _tail(csv_path, size):
+                        appended = read_appended(csv_path, size)
+                        extended = (extend(meta["report"], arrays, appended, interval, tolerance)
+                                    if appended is not None else (meta["report"], arrays))
+                        if extended is not None:
+                            return _save(csv_path, *extended, interval, tolerance)
+        except (OSError, ValueError, KeyError):
+            pass
+    return build_index(csv_path, interval, tolerance)
+
+
+def warn_if_unclean(csv_path, **kwargs):
+    # One-line heads-up for scripts about to use the series; never raises on a bad file
+    try:
+        index = check_series(csv_path, **kwargs)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Integrity check of {os.path.basename(csv_path)} failed: {e}")
+        return None
+    if not index.report["ok"]:
+        print(f"⚠️ {os.path.basename(csv_path)}: {index.summary()} "
+              f"(details: python {os.path.relpath(os.path.abspath(__file__))} {csv_path} --details)")
+    return index
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check funding series for gaps, duplicates, ordering and timestamp drift")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--interval", type=float, default=8, help="Funding interval in hours")
+    parser.add_argument("--tolerance-ms", type=float, default=default_tolerance / 1e6, help="Allowed drift off the slot")
+    parser.add_argument("--details", action="store_true", help="List the offending rows and slots")
+    args = parser.parse_args()
+    interval = int(args.interval * HOUR_NS)
+    tolerance = int(args.tolerance_ms * 1e6)
+
+    clean = True
+    for csv_path in args.files:
+        index = check_series(csv_path, interval, tolerance)
+        clean &= index.report["ok"]
+        r = index.report
+        print(f"{'✅' if r['ok'] else '❌'} {csv_path}: {index.summary()} "
+              f"(max drift {r['max_drift_ms']:.0f} ms, {r['shifted']} rows on whole-hour shifts)")
+        if args.details and not r["ok"]:
+            limit = 20
+            for label, times in (("missing", index.slot_time(index.missing[:limit])),
+                                 ("conflicting", index.slot_time(index.conflicts[:limit]))):
+                if len(times):
+                    print(f"   {label} slots: " + ", ".join(str(t) for t in times))
+            for label, rows in (("duplicate", index.duplicates), ("out-of-order", index.out_of_order),
+                                ("drifted", index.drifted)):
+                if len(rows):
+                    # +2: header line and 1-based line numbers
+                    print(f"   {label} rows (CSV line): " + ", ".join(str(i + 2) for i in rows[:limit])
+                          + (" ..." if len(rows) > limit else ""))
+    sys.exit(0 if clean else 1)
@@ -0,0 +1,230 @@
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from columnar import load_frame, read_csv_frame
+
+# Fixed-record binary store of one funding series per (venue, symbol): <name>.rec next to
+# <venue>_<symbol>_funding.csv. After a 4 KB header come 24-byte records (timestamp int64 epoch
+# nanoseconds of the stored wall-clock value, fundingRate float64, price float64) in time order.
+# Readers open it with np.memmap, so every backtest process maps the same page-cached bytes:
+# no parse, and a time range is a slice of the mapping.
+#
+# The header holds the committed record count and a sparse index (the timestamp of every
+# `stride`-th record). A range lookup binary-searches that index, then only the one block of
+# records it points at. Appends write the new records past the committed ones first and bump the
+# count afterwards, so a reader never sees a torn record and a crash mid-append loses nothing
+# that was committed.
+
+MAGIC = b"FUNDREC1"
+format_version = 1
+HEADER_SIZE = 4096
+record_dtype = np.dtype([("timestamp", "<i8"), ("fundingRate", "<f8"), ("price", "<f8")])
+
+# magic, version, record size, committed records, index stride, index entries
+_header = struct.Struct("<8sIIQQQ")
+_index_offset = 64
+index_capacity = (HEADER_SIZE - _index_offset) // 8
+default_stride = 256
+
+
+def store_path(csv_path):
+    root, _ = os.path.splitext(csv_path)
+    return root + ".rec"
+
+
+def _to_records(frame):
+    # (timestamp, fundingRate, price) frame -> records in time order (stable for equal stamps)
+    records = np.empty(len(frame), dtype=record_dtype)
+    records["timestamp"] = frame["timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    records["fundingRate"] = frame["fundingRate"].to_numpy(dtype=np.float64)
+    records["price"] = frame["price"].to_numpy(dtype=np.float64)
+    return records[np.argsort(records["timestamp"], kind="stable")]
+
+
+def _index_for(stamps, stride=default_stride):
+    # Every stride-th timestamp; the stride doubles until the index fits in the header
+    while (len(stamps) + stride - 1) // stride > index_capacity:
+        stride *= 2
+    return stride, np.ascontiguousarray(stamps[::stride], dtype="<i8")
+
+
+def _write_header(f, count, stride, index):
+    f.seek(0)
+    f.write(_header.pack(MAGIC, format_version, record_dtype.itemsize, count, stride, len(index)))
+    f.seek(_index_offset)
+    f.write(index.tobytes())
+
+
+class RecordStore:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            raw = f.read(HEADER_SIZE)
+        if len(raw) < HEADER_SIZE:
+            raise ValueError(f"{path}: truncated header")
+        magic, version, size, count, stride, entries = _header.unpack_from(raw)
+        if magic != MAGIC or version != format_version or size != record_dtype.itemsize:
+            raise ValueError(f"{path}: not a version {format_version} funding record store")
+        self.count = count
+        self.stride = stride
+        self.index = np.frombuffer(raw, dtype="<i8", count=entries, offset=_index_offset)
+        # Zero-length files can't be mapped
+        self.records = (np.memmap(path, dtype=record_dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+                        if count else np.empty(0, dtype=record_dtype))
+
+    @classmethod
+    def create(cls, path, frame):
+        # Atomic: built in a temp file in the same folder, then renamed over `path`
+        records = _to_records(frame)
+        stride, index = _index_for(records["timestamp"])
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".rec.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                _write_header(f, len(records), stride, index)
+                f.seek(HEADER_SIZE)
+                f.write(records.tobytes())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return cls(path)
+
+    def append(self, frame):
+        # Adds every row of `frame` after the stored records; returns how many were written.
+        # Rows may share the last stored timestamp but not precede it (ValueError: rebuild instead)
+        return self._append_records(_to_records(frame))
+
+    def _append_records(self, records):
+        if not len(records):
+            return 0
+        if self.count and records["timestamp"][0] < self.records["timestamp"][-1]:
+            raise ValueError(f"{self.path}: appended rows are older than the last stored record")
+        count = self.count + len(records)
+        with open(self.path, "r+b") as f:
+            f.seek(HEADER_SIZE + self.count * record_dtype.itemsize)
+            f.write(records.tobytes())
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+            stamps = np.concatenate([self.records["timestamp"], records["timestamp"]])
+            stride, index = _index_for(stamps, self.stride)
+            _write_header(f, count, stride, index)
+            f.flush()
+            os.fsync(f.fileno())
+        self.__init__(self.path)
+        return len(records)
+
+    def _position(self, ns, side):
+        # Index of `ns` in the stamps (np.searchsorted semantics) touching one block of records
+        block = max(int(np.searchsorted(self.index, ns, side=side)) - 1, 0)
+        lo = block * self.stride
+        hi = min(lo + self.stride, self.count)
+        return lo + int(np.searchsorted(self.records["timestamp"][lo:hi], ns, side=side))
+
+    def range(self, start=None, end=None):
+        # (lo, hi) record positions of start <= timestamp <= end
+        lo = 0 if start is None else self._position(pd.Timestamp(start).value, "left")
+        hi = self.count if end is None else self._position(pd.Timestamp(end).value, "right")
+        return lo, max(lo, hi)
+
+    def slice(self, start=None, end=None):
+        # Records in [start, end] as a view of the mapping (no copy)
+        lo, hi = self.range(start, end)
+        return self.records[lo:hi]
+
+    def frame(self, start=None, end=None):
+        # fundingRate and price are one float block viewing the mapping itself, so a frame held
+        # by every worker costs only its timestamp column (pandas always copies that one). The
+        # block is read-only: copy() the frame before writing into those columns.
+        records = np.asarray(self.slice(start, end))
+        values = records.view(np.float64).reshape(len(records), 3)[:, 1:]
+        df = pd.DataFrame(values, columns=["fundingRate", "price"], copy=False)
+        df.insert(0, "timestamp", records["timestamp"].view("datetime64[ns]"))
+        return df
+
+
+def store_is_fresh(csv_path):
+    path = store_path(csv_path)
+    if not os.path.exists(path):
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(path) >= os.path.getmtime(csv_path)
+
+
+def sync_store(csv_path):
+    # Brings the store level with its CSV: appends the new rows when the CSV only grew
+    # (fetchers append), rebuilds it when earlier rows changed. Stored records are compared
+    # byte for byte, values included, so a rewrite that corrects rates or prices is caught too
+    df = load_frame(csv_path)
+    path = store_path(csv_path)
+    try:
+        store = RecordStore(path)
+    except (OSError, ValueError):
+        return RecordStore.create(path, df)
+    records = _to_records(df)
+    if store.count <= len(records) and records[:store.count].tobytes() == np.asarray(store.records).tobytes():
+        if store.count < len(records):
+            store._append_records(records[store.count:])
+        else:
+            os.utime(path)
+        return store
+    return RecordStore.create(path, df)
+
+
+def load_records(csv_path, start=None, end=None):
+    # Funding frame (time-ordered) from the store when the series has one, else from the CSV.
+    # A stale store (the CSV was appended to since) is synced first.
+    if os.path.exists(store_path(csv_path)):
+        store = RecordStore(store_path(csv_path)) if store_is_fresh(csv_path) else sync_store(csv_path)
+        return store.frame(start, end)
+    df = load_frame(csv_path)
+    df = df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+    if start is not None:
+        df = df[df["timestamp"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["timestamp"] <= pd.Timestamp(end)]
+    return df.reset_index(drop=True)
+
+
+def _is_funding_csv(path):
+    with open(path) as f:
+        return f.readline().strip().split(",")[:3] == ["timestamp", "fundingRate", "price"]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the memory-mapped record stores of funding CSVs and time their loads")
+    parser.add_argument("files", nargs="+", help="<venue>_<symbol>_funding.csv files")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed loads per file (best is kept)")
+    args = parser.parse_args()
+
+    ok = True
+    for csv_path in args.files:
+        if not _is_funding_csv(csv_path):
+            print(f"⏭️ {csv_path}: not a (timestamp, fundingRate, price) file")
+            continue
+        store = sync_store(csv_path)
+        expected = read_csv_frame(csv_path).sort_values("timestamp", kind="stable").reset_index(drop=True)
+        same = store.frame().equals(expected[["timestamp", "fundingRate", "price"]])
+        ok &= same
+
+        timings = {}
+        for name, load in (("csv", lambda: read_csv_frame(csv_path)), ("memmap", lambda: RecordStore(store_path(csv_path)).frame())):
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                load()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+        print(f"{'✅' if same else '❌'} {csv_path}: {store.count} records, {os.path.getsize(store_path(csv_path)) / 1024:.0f} KB, "
+              f"load {timings['csv'] * 1000:.1f} ms -> {timings['memmap'] * 1000:.2f} ms")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,400 @@
+import argparse
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+
+try:
+    import fcntl
+except ImportError:     # Windows: fall back to an exclusive lock file
+    fcntl = None
+
+# Incremental snapshots of the data folders, instead of hand-made full copies like data/backup/.
+# File contents are stored once as content-addressed chunks (sha256 of the raw bytes, zlib on
+# disk) under data/snapshots/chunks/; a snapshot is a manifest listing each file's chunks.
+#
+# Our CSVs are append-only, so the chunk list of a file that grew since the last snapshot is its
+# previous list plus chunks of the appended bytes only: a snapshot reads and stores just the new
+# rows. A file whose size and mtime are unchanged isn't opened at all; anything else (rewritten
+# backtest outputs) is re-chunked from the start in fixed-size chunks, which also dedupes the
+# identical leading rows of the near-identical outputs. Restores rebuild any file of any
+# snapshot and check every chunk's hash on the way.
+#
+# SQLite stores (DataBase.sqlite) aren't append-only and can be mid-merge: they are copied
+# with SQLite's online backup, which reads one committed state, and the copy is chunked like a
+# rewritten file. Committed writes can sit in the -wal file, so the unchanged check looks at both.
+#
+# Taking a snapshot holds a non-blocking lock: a second one started meanwhile (e.g. from the
+# hourly launcher) returns at once instead of queueing behind it.
+
+root_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+snapshot_dir = os.environ.get("SNAPSHOT_DIR", os.path.join(root_dir, "data", "snapshots"))
+
+# === Configuration ===
+default_sources = ["data", os.path.join("src", "BackTesting", "data")]
+include = ["*.csv", "*.json", "*.sqlite"]
+databases = ["*.sqlite"]    # copied through SQLite's backup API instead of read as bytes
+exclude = ["*/snapshots/*", "*/cache/*", "*/price_cache/*"]
+chunk_size = 256 * 1024
+max_tail_chunks = 64    # small append pieces at a file's end before they're merged into full chunks
+tail_bytes = 4096       # end of a file hashed to tell an append from a rewrite
+keep_last = 48          # most recent snapshots always kept
+keep_daily = 30         # plus the last snapshot of each of the previous N days
+# Labeled snapshots (--label) are never pruned
+
+
+def _chunk_path(directory, digest):
+    return os.path.join(directory, "chunks", digest[:2], digest)
+
+
+def _manifest_dir(directory):
+    return os.path.join(directory, "manifests")
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _store_chunks(directory, f, length, stats):
+    # Reads `length` bytes from f in chunk_size pieces; stores the ones not seen before
+    chunks = []
+    while length > 0:
+        data = f.read(min(chunk_size, length))
+        if not data:
+            break
+        length -= len(data)
+        digest = hashlib.sha256(data).hexdigest()
+        path = _chunk_path(directory, digest)
+        stats["read_bytes"] += len(data)
+        if not os.path.exists(path):
+            _write_atomic(path, zlib.compress(data, 6))
+            stats["new_chunks"] += 1
+            stats["new_bytes"] += len(data)
+        chunks.append([digest, len(data)])
+    return chunks
+
+
+def _tail_hash(f, size, stats):
+    # sha256 of the last tail_bytes before `size`
+    length = min(size, tail_bytes)
+    f.seek(size - length)
+    stats["read_bytes"] += length
+    return hashlib.sha256(f.read(length)).hexdigest()
+
+
+def _snapshot_file(directory, path, previous, stats):
+    stat = os.stat(path)
+    size, mtime_ns = stat.st_size, stat.st_mtime_ns
+    if previous is not None and previous["size"] == size and previous["mtime_ns"] == mtime_ns:
+        stats["unchanged_files"] += 1
+        return previous
+    with open(path, "rb") as f:
+        entry = {"size": size, "mtime_ns": mtime_ns}
+        if (previous is not None and previous["chunks"] and 0 < previous["size"] < size
+                and _tail_hash(f, previous["size"], stats) == previous["tail"]):
+            # Grown with the old end still in place: keep the old chunks, chunk the new bytes
+            f.seek(previous["size"])
+            stats["appended_files"] += 1
+            chunks = previous["chunks"] + _store_chunks(directory, f, size - previous["size"], stats)
+            # Hourly appends leave one small piece each; once there are many, merge them
+            tail = len(chunks)
+            while tail > 0 and chunks[tail - 1][1] < chunk_size:
+                tail -= 1
+            if len(chunks) - tail > max_tail_chunks:
+                f.seek(size - sum(length for _, length in chunks[tail:]))
+                chunks = chunks[:tail] + _store_chunks(directory, f, size - f.tell(), stats)
+        else:
+            stats["rewritten_files"] += 1
+            # Only the first `size` bytes: rows a fetcher appends meanwhile go to the next snapshot
+            f.seek(0)
+            chunks = _store_chunks(directory, f, size, stats)
+        entry["chunks"] = chunks
+        entry["tail"] = _tail_hash(f, size, stats)
+        return entry
+
+
+def _is_database(path):
+    return any(fnmatch.fnmatch(os.path.basename(path), p) for p in databases)
+
+
+def _database_state(path):
+    # [size, mtime] of the database and of its WAL, if any
+    return [[stat.st_size, stat.st_mtime_ns] for stat in (os.stat(p) for p in (path, path + "-wal") if os.path.exists(p))]
+
+
+def _snapshot_database(directory, path, previous, stats):
+    state = _database_state(path)
+    if previous is not None and previous.get("state") == state:
+        stats["unchanged_files"] += 1
+        return previous
+    # A merge committing meanwhile changes the state, so the next snapshot copies it again
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".sqlite.tmp")
+    os.close(fd)
+    try:
+        source = sqlite3.connect(path)
+        target = sqlite3.connect(tmp_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        size = os.path.getsize(tmp_path)
+        stats["rewritten_files"] += 1
+        with open(tmp_path, "rb") as f:
+            return {"size": size, "state": state, "chunks": _store_chunks(directory, f, size, stats)}
+    finally:
+        os.remove(tmp_path)
+
+
+def list_files(sources=None):
+    files = set()
+    for source in sources or default_sources:
+        source = os.path.join(root_dir, source)
+        candidates = [source] if os.path.isfile(source) else glob.glob(os.path.join(source, "**", "*"), recursive=True)
+        for path in candidates:
+            rel = os.path.relpath(path, root_dir).replace(os.sep, "/")
+            if (os.path.isfile(path) and any(fnmatch.fnmatch(os.path.basename(path), p) for p in include)
+                    and not any(fnmatch.fnmatch("/" + rel, p) for p in exclude)):
+                files.add(rel)
+    return sorted(files)
+
+
+def list_snapshots(directory=snapshot_dir):
+    # Manifests, oldest first
+    paths = sorted(glob.glob(os.path.join(_manifest_dir(directory), "*.json")))
+    snapshots = []
+    for path in paths:
+        with open(path) as f:
+            snapshots.append(json.load(f))
+    return snapshots
+
+
+def load_manifest(snapshot_id, directory=snapshot_dir):
+    path = os.path.join(_manifest_dir(directory), f"{snapshot_id}.json")
+    if not os.path.exists(path):
+        raise ValueError(f"No snapshot {snapshot_id} in {directory}")
+    with open(path) as f:
+        return json.load(f)
+
+
+class _Lock:
+    # Non-blocking exclusive lock on <directory>/.lock; acquired is False when already held
+    def __init__(self, directory):
+        self.path = os.path.join(directory, ".lock")
+        self.fd = None
+        self.acquired = False
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if fcntl is not None:
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self.acquired = True
+            except OSError:
+                pass
+        else:
+            try:
+                self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+                self.acquired = True
+            except FileExistsError:
+                pass
+        return self
+
+    def __exit__(self, *exc):
+        if self.fd is not None:
+            os.close(self.fd)
+            if fcntl is None and self.acquired:
+                os.remove(self.path)
+
+
+def take_snapshot(sources=None, label=None, directory=snapshot_dir, prune_after=True):
+    # Returns the manifest, or None when another snapshot is running
+    with _Lock(directory) as lock:
+        if not lock.acquired:
+            return None
+        started = time.perf_counter()
+        snapshots = list_snapshots(directory)
+        # Each file's newest entry, also when the last snapshot only covered some paths
+        known = {}
+        for snapshot in snapshots:
+            known.update(snapshot["files"])
+        stats = {"read_bytes": 0, "new_bytes": 0, "new_chunks": 0,
+                 "unchanged_files": 0, "appended_files": 0, "rewritten_files": 0}
+        files = {}
+        for rel in list_files(sources):
+            snapshot_file = _snapshot_database if _is_database(rel) else _snapshot_file
+            try:
+                files[rel] = snapshot_file(directory, os.path.join(root_dir, rel), known.get(rel), stats)
+            except FileNotFoundError:
+                continue      # removed while we were listing
+
+        now = datetime.now(tz=timezone.utc)
+        snapshot_id = now.strftime("%Y%m%dT%H%M%S%fZ")
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        manifest = {"id": snapshot_id, "created_at": now.isoformat(), "label": label,
+                    "sources": sorted(sources or default_sources),
+                    "parent": snapshots[-1]["id"] if snapshots else None, "files": files, "stats": stats}
+        _write_atomic(os.path.join(_manifest_dir(directory), f"{snapshot_id}.json"),
+                      json.dumps(manifest, indent=1).encode())
+        if prune_after:
+            _prune(keep_last, keep_daily, directory)
+        return manifest
+
+
+def restore(snapshot_id, target=root_dir, paths=None, directory=snapshot_dir):
+    # Rebuilds the snapshot's files (or only `paths`, patterns allowed) under `target`
+    manifest = load_manifest(snapshot_id, directory)
+    restored = []
+    for rel, entry in manifest["files"].items():
+        if paths and not any(fnmatch.fnmatch(rel, p) for p in paths):
+            continue
+        out_path = os.path.join(target, rel)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        tmp_path = out_path + ".restore.tmp"
+        try:
+            with open(tmp_path, "wb") as out:
+                for digest, length in entry["chunks"]:
+                    with open(_chunk_path(directory, digest), "rb") as f:
+                        data = zlib.decompress(f.read())
+                    if len(data) != length or hashlib.sha256(data).hexdigest() != digest:
+                        raise ValueError(f"Chunk {digest} of {rel} is corrupt")
+                    out.write(data)
+            if _is_database(rel):
+                # The replaced database's WAL would be replayed onto the restored one
+                for stale in (out_path + "-wal", out_path + "-shm"):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+            os.replace(tmp_path, out_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        restored.append(rel)
+    return restored
+
+
+def verify(snapshot_id, directory=snapshot_dir):
+    # Names of the files whose chunks are missing or corrupt
+    manifest = load_manifest(snapshot_id, directory)
+    bad = []
+    for rel, entry in manifest["files"].items():
+        for digest, length in entry["chunks"]:
+            try:
+                with open(_chunk_path(directory, digest), "rb") as f:
+                    data = zlib.decompress(f.read())
+            except (OSError, zlib.error):
+                bad.append(rel)
+                break
+            if len(data) != length or hashlib.sha256(data).hexdigest() != digest:
+                bad.append(rel)
+                break
+    return bad
+
+
+def prune(keep_last=keep_last, keep_daily=keep_daily, directory=snapshot_dir):
+    # (removed snapshot ids, freed bytes), or None when a snapshot is running
+    with _Lock(directory) as lock:
+        return _prune(keep_last, keep_daily, directory) if lock.acquired else None
+
+
+def _prune(keep_last, keep_daily, directory, now=None):
+    # Drops snapshots outside the retention, then the chunks no kept snapshot references
+    # Applied per set of snapshotted paths, so one-off snapshots of a few files never push the
+    # regular ones out
+    now = now or datetime.now(tz=timezone.utc)
+    snapshots = list_snapshots(directory)
+    scopes = {}
+    for s in snapshots:
+        scopes.setdefault(tuple(s.get("sources", default_sources)), []).append(s)
+
+    keep = {s["id"] for s in snapshots if s.get("label")}
+    for scoped in scopes.values():
+        if keep_last:
+            keep |= {s["id"] for s in scoped[-keep_last:]}
+        last_of_day = {}
+        for s in scoped:
+            day = datetime.fromisoformat(s["created_at"]).date()
+            if now.date() - day <= timedelta(days=keep_daily):
+                last_of_day[day] = s["id"]
+        keep |= set(last_of_day.values())
+
+    removed = [s["id"] for s in snapshots if s["id"] not in keep]
+    for snapshot_id in removed:
+        os.remove(os.path.join(_manifest_dir(directory), f"{snapshot_id}.json"))
+
+    referenced = {digest for s in snapshots if s["id"] in keep
+                  for entry in s["files"].values() for digest, _ in entry["chunks"]}
+    freed = 0
+    for path in glob.glob(os.path.join(directory, "chunks", "*", "*")):
+        if os.path.basename(path) not in referenced and not path.endswith(".tmp"):
+            freed += os.path.getsize(path)
+            os.remove(path)
+    return removed, freed
+
+
+def _size(n):
+    if n < 1000:
+        return f"{n} B"
+    return f"{n / 1e6:.2f} MB" if n >= 1e5 else f"{n / 1e3:.1f} KB"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Incremental, content-addressed snapshots of the data folders")
+    parser.add_argument("--dir", default=snapshot_dir, help="Snapshot store (default: data/snapshots, or $SNAPSHOT_DIR)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    take = commands.add_parser("take", help="Snapshot the data folders (or the given paths, relative to the repo)")
+    take.add_argument("paths", nargs="*")
+    take.add_argument("--label", help="Named snapshot, kept by the retention")
+    commands.add_parser("list", help="List the snapshots")
+    rest = commands.add_parser("restore", help="Write a snapshot's files back")
+    rest.add_argument("snapshot")
+    rest.add_argument("--to", default=root_dir, help="Target folder (default: the repo, overwriting the files)")
+    rest.add_argument("--path", action="append", help="Only these files (patterns allowed)")
+    check = commands.add_parser("verify", help="Check every chunk of a snapshot")
+    check.add_argument("snapshot")
+    pr = commands.add_parser("prune", help="Apply the retention")
+    pr.add_argument("--keep-last", type=int, default=keep_last)
+    pr.add_argument("--keep-daily", type=int, default=keep_daily)
+    args = parser.parse_args()
+
+    if args.command == "take":
+        manifest = take_snapshot(args.paths or None, args.label, args.dir)
+        if manifest is None:
+            print("⏭️ Another snapshot is running, skipped")
+            sys.exit(0)
+        s = manifest["stats"]
+        total = sum(e["size"] for e in manifest["files"].values())
+        print(f"✅ Snapshot {manifest['id']}: {len(manifest['files'])} files ({_size(total)}), "
+              f"{s['unchanged_files']} unchanged, {s['appended_files']} appended, {s['rewritten_files']} rewritten; "
+              f"read {_size(s['read_bytes'])}, stored {_size(s['new_bytes'])} in {s['new_chunks']} new chunks, {s['seconds']:.2f}s")
+    elif args.command == "list":
+        for m in list_snapshots(args.dir):
+            total = sum(e["size"] for e in m["files"].values())
+            print(f"{m['id']}  {len(m['files']):>3} files  {_size(total):>10}  +{_size(m['stats']['new_bytes']):>10}"
+                  + (f"  [{m['label']}]" if m.get("label") else ""))
+    elif args.command == "restore":
+        restored = restore(args.snapshot, args.to, args.path, args.dir)
+        print(f"✅ Restored {len(restored)} files from {args.snapshot} into {args.to}")
+    elif args.command == "verify":
+        bad = verify(args.snapshot, args.dir)
+        print(f"❌ {len(bad)} damaged files: {', '.join(bad)}" if bad else f"✅ {args.snapshot} is intact")
+        sys.exit(1 if bad else 0)
+    elif args.command == "prune":
+        result = prune(args.keep_last, args.keep_daily, args.dir)
+        if result is None:
+            print("⏭️ A snapshot is running, try again later")
+            sys.exit(1)
+        removed, freed = result
+        print(f"🧹 Removed {len(removed)} snapshots, freed {_size(freed)}")
@@ -0,0 +1,182 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from columnar import load_frame, read_appended, sniff_decimal
+
+# Embedded SQLite store of the merged backtest + live rows behind the dashboards, replacing the
+# hourly full rewrite of DataBase.csv. One row per (timestamp, source, symbol), enforced by a
+# unique index; timestamps are int64 epoch nanoseconds of the stored (naive) wall-clock value,
+# the same encoding as the columnar twins, so range filters are integer index scans.
+#
+# Each input CSV is remembered in `imports` by path, byte size and a fingerprint of its last
+# bytes. A file that only grew since the last merge (fetchers append) is parsed from the stored
+# offset and its rows inserted; a rewritten file replaces its source's rows over its own time
+# span; an unchanged file is skipped without being opened. Duplicates keep the first row seen,
+# as the CSV merge did.
+# DataBase.csv itself is deprecated: import_legacy_csv carries its history over once.
+
+default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "DataBase.sqlite")
+
+columns = ["timestamp", "fundingRate", "price", "position", "fees_paid", "profit", "trade_id", "btc_balance", "source", "symbol"]
+_fingerprint_bytes = 64
+
+_schema = """
+CREATE TABLE IF NOT EXISTS rows (
+    timestamp   INTEGER NOT NULL,
+    fundingRate REAL,
+    price       REAL,
+    position    TEXT,
+    fees_paid   REAL,
+    profit      REAL,
+    trade_id    REAL,
+    btc_balance REAL,
+    source      TEXT NOT NULL,
+    symbol      TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS rows_key ON rows (timestamp, source, symbol);
+CREATE INDEX IF NOT EXISTS rows_source_time ON rows (source, symbol, timestamp);
+CREATE INDEX IF NOT EXISTS rows_source_position ON rows (source, position, timestamp);
+CREATE TABLE IF NOT EXISTS imports (
+    path        TEXT PRIMARY KEY,
+    source      TEXT NOT NULL,
+    symbol      TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    fingerprint BLOB NOT NULL
+);
+"""
+
+
+def connect(path=default_path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    con = sqlite3.connect(path)
+    # WAL: the dashboards keep reading while the hourly merge writes
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(_schema)
+    return con
+
+
+def _fingerprint(path, size):
+    with open(path, "rb") as f:
+        f.seek(max(size - _fingerprint_bytes, 0))
+        return f.read(min(size, _fingerprint_bytes))
+
+
+def _records(df, source, symbol):
+    # Frame -> rows tuples in `columns` order; missing columns and NaN become NULL
+    df = df.drop_duplicates(subset=["timestamp"])
+    n = len(df)
+    out = {"timestamp": df["timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64).tolist()}
+    for name in columns[1:-2]:
+        if name not in df:
+            out[name] = [None] * n
+        elif name == "position":
+            out[name] = [None if pd.isna(v) else str(v) for v in df[name]]
+        else:
+            values = pd.to_numeric(df[name], errors="coerce").astype(float)
+            out[name] = [None if v != v else v for v in values.tolist()]
+    out["source"] = [source] * n
+    out["symbol"] = [symbol] * n
+    return list(zip(*(out[name] for name in columns)))
+
+
+def _insert(con, rows):
+    placeholders = ", ".join("?" for _ in columns)
+    before = con.total_changes
+    con.executemany(f"INSERT INTO rows ({', '.join(columns)}) VALUES ({placeholders}) "
+                    f"ON CONFLICT (timestamp, source, symbol) DO NOTHING", rows)
+    return con.total_changes - before
+
+
+def import_csv(con, path, source, symbol, decimal=None):
+    # Upserts the rows of `path` under (source, symbol); returns the number of rows inserted
+    path = os.path.abspath(path)
+    if not os.path.exists(path):
+        return 0
+    size = os.path.getsize(path)
+    known = con.execute("SELECT size, fingerprint FROM imports WHERE path = ?", (path,)).fetchone()
+    if known is not None and known[0] == size and bytes(known[1]) == _fingerprint(path, size):
+        return 0
+
+    decimal = decimal or sniff_decimal(path)
+    with con:
+        if (known is not None and known[0] < size
+                and bytes(known[1]) == _fingerprint(path, known[0])):
+            df = read_appended(path, known[0], decimal)
+            inserted = _insert(con, _records(df, source, symbol)) if df is not None else 0
+        else:
+            # New or rewritten (e.g. a backtest rerun): its rows replace the source's over the
+            # span the file covers; older rows outside it (history imported from the legacy
+            # DataBase.csv) stay
+            rows = _records(load_frame(path, decimal=decimal), source, symbol)
+            if rows:
+                stamps = [row[0] for row in rows]
+                con.execute("DELETE FROM rows WHERE source = ? AND symbol = ? AND timestamp BETWEEN ? AND ?",
+                            (source, symbol, min(stamps), max(stamps)))
+            inserted = _insert(con, rows)
+        con.execute("INSERT OR REPLACE INTO imports (path, source, symbol, size, fingerprint) VALUES (?, ?, ?, ?, ?)",
+                    (path, source, symbol, size, _fingerprint(path, size)))
+    return inserted
+
+
+def import_legacy_csv(con, path, symbol):
+    # One-time import of the old merged CSV (rows tagged by a `source` column), run after the
+    # current inputs so it only fills in rows they no longer hold; once recorded in `imports`
+    # the file is never read again. Returns the number of rows inserted
+    path = os.path.abspath(path)
+    if not os.path.exists(path) or con.execute("SELECT 1 FROM imports WHERE path = ?", (path,)).fetchone():
+        return 0
+    size = os.path.getsize(path)
+    df = load_frame(path)
+    with con:
+        inserted = sum(_insert(con, _records(rows, source, symbol)) for source, rows in df.groupby("source"))
+        con.execute("INSERT INTO imports (path, source, symbol, size, fingerprint) VALUES (?, ?, ?, ?, ?)",
+                    (path, "legacy", symbol, size, _fingerprint(path, size)))
+    return inserted
+
+
+def _ns(value):
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.value
+
+
+def _where(source=None, symbol=None, start=None, end=None, position=None):
+    clauses, params = [], []
+    for name, value in (("source", source), ("symbol", symbol), ("position", position)):
+        if value is not None:
+            clauses.append(f"{name} = ?")
+            params.append(value)
+    if start is not None:
+        clauses.append("timestamp >= ?")
+        params.append(_ns(start))
+    if end is not None:
+        clauses.append("timestamp <= ?")
+        params.append(_ns(end))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def query(con, source=None, symbol=None, start=None, end=None, position=None, latest=None, fields=None):
+    # Rows filtered on the indexed columns, in time order; `latest` keeps only the newest N
+    where, params = _where(source, symbol, start, end, position)
+    sql = f"SELECT {', '.join(fields or columns)} FROM rows{where}"
+    if latest is not None:
+        sql = f"SELECT * FROM ({sql} ORDER BY timestamp DESC LIMIT {int(latest)})"
+    df = pd.read_sql_query(sql + " ORDER BY timestamp", con, params=params)
+    if "timestamp" in df:
+        df["timestamp"] = pd.to_datetime(df["timestamp"].astype(np.int64), unit="ns")
+    return df
+
+
+def count_rows(con, source=None, symbol=None, start=None, end=None, position=None):
+    where, params = _where(source, symbol, start, end, position)
+    return con.execute(f"SELECT COUNT(*) FROM rows{where}", params).fetchone()[0]
+
+
+def count_trades(con, source=None, symbol=None, start=None, end=None, position=None):
+    # Distinct trade ids, the "# Trades" KPI
+    where, params = _where(source, symbol, start, end, position)
+    return con.execute(f"SELECT COUNT(DISTINCT trade_id) FROM rows{where}", params).fetchone()[0]
@@ -10,6 +10,7 @@ base_dir = os.path.dirname(os.path.abspath(__file__))
 FETCH_SCRIPT = os.path.join(base_dir, "Daily_Fund_Fetcher.py")
 BOT_SCRIPT = os.path.join(base_dir, "Bot.py")
 MERGE_SCRIPT = os.path.join(base_dir, "DataBase.py")
+SNAPSHOT_SCRIPT = os.path.join(base_dir, "..", "Storage", "snapshot.py")
 
 def run_all():
     print("\n🚀 Starting full bot sequence...")
@@ -17,6 +18,9 @@ def run_all():
         subprocess.run(["python", FETCH_SCRIPT], check=True)
         subprocess.run(["python", BOT_SCRIPT], check=True)
         subprocess.run(["python", MERGE_SCRIPT], check=True)
+        # Incremental backup of the data folders in the background, so it never delays the next
+        # run (a snapshot still running from the previous hour makes this one skip)
+        subprocess.Popen(["python", SNAPSHOT_SCRIPT, "take"])
         print("✅ Sequence completed!")
     except subprocess.CalledProcessError as e:
         print(f"❌ Error during execution: {e}")
@@ -1,33 +1,41 @@
-import requests
 import pandas as pd
-import time
 import os
 import sys
-import shutil
-import tempfile
 from datetime import datetime, timedelta, timezone
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Exchange"))
+from market_data import (BINANCE_FAPI, fetch, binance_funding_request, binance_funding_history,
+                         binance_mark_price_klines, kline_range, attach_mark_prices)
+from http_client import print_latency_report
+from funding_files import tail_lines, repair_tail, append_funding_rows
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Storage"))
+from integrity import warn_if_unclean
+
 # Configuration for Binance endpoints and symbol
 symbol = "BTCUSDT"
-limit = 1000
-funding_url = "https://fapi.binance.com/fapi/v1/fundingRate"
-kline_url = "https://fapi.binance.com/fapi/v1/markPriceKlines"
+base_url = os.environ.get("BINANCE_FAPI_URL", BINANCE_FAPI)
 
 # Resolve absolute path to data directory relative to the script
 base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 csv_path = os.path.join(base_dir, "data", "binance_btcusdt_funding_live.csv")
-temp_csv_path = os.path.join(tempfile.gettempdir(), "temp_binance_funding.csv")
+known_tail_rows = 32  # rows read back from the end of the file; new fundings only land after them
 
-# Load existing data to prevent duplications in results
+# Known funding times (UTC seconds) from the tail of the file: it is only ever appended to in
+# time order, so the tail is all we need to find where to resume and to skip duplicates, and
+# an hourly run costs the same however large the file grows
+known_funding_times = set()
 if os.path.exists(csv_path):
-    # Read existing CSV and find the most recent timestamp
     try:
-        df_existing = pd.read_csv(csv_path, parse_dates=['timestamp'], decimal=',')
-        last_timestamp = df_existing['timestamp'].max()
-        
-        # Convert last_timestamp to UTC to ensure consistent timezone handling
-        if last_timestamp.tzinfo is None:
-            last_timestamp = last_timestamp.replace(tzinfo=timezone.utc)
+        repair_tail(csv_path)
+        for line in tail_lines(csv_path, known_tail_rows):
+            if line and not line.startswith("timestamp"):
+                stamp = pd.Timestamp(line.split(",", 1)[0]).tz_localize(timezone.utc)
+                known_funding_times.add(int(stamp.timestamp()))
+        if not known_funding_times:
+            raise ValueError("no funding rows in file")
+        # Stored timestamps are naive UTC
+        last_timestamp = datetime.fromtimestamp(max(known_funding_times), tz=timezone.utc)
         
         # IMPORTANT CHANGE: Use the latest timestamp we have as the start time
         # without adding 8 hours, to ensure we catch any already published rates
@@ -46,8 +54,7 @@ if os.path.exists(csv_path):
         start_time = int((current_time_utc - timedelta(hours=24)).timestamp() * 1000)
         print("Error with existing data, starting from 24 hours ago")
 else:
-    # Initialize new DataFrame if no file exists and set start time to 24 hours ago
-    df_existing = pd.DataFrame()
+    # Set start time to 24 hours ago if no file exists
     current_time_utc = datetime.now(timezone.utc)
     start_time = int((current_time_utc - timedelta(hours=24)).timestamp() * 1000)
     print("No existing data found, starting from 24 hours ago")
@@ -69,59 +76,12 @@ if start_time > end_time + (3 * 24 * 60 * 60 * 1000):
 all_data = []
 print("📡 Fetching latest Binance funding and BTC price...")
 
-# Fetch funding and price data in chunks until reaching the current time
+# Fetch funding data in pages until reaching the current time; prices are attached below
 max_end_time = end_time + (3 * 24 * 60 * 60 * 1000)  # Allow fetching 3 days ahead for pre-published rates
-while start_time < max_end_time:
-    params = {
-        "symbol": symbol,
-        "limit": limit,
-        "startTime": start_time
-    }
-    print(f"API query params: {params}")
-    resp = requests.get(funding_url, params=params)
-    data = resp.json()
-    print(f"API response: Got {len(data)} records")
-
-    if not data:
-        print("No data returned from API")
-        break  # Exit if no data returned
-
-    for entry in data:
-        funding_time = int(entry['fundingTime'])
-        funding_rate = float(entry['fundingRate'])
-
-        # Align funding time to the nearest full hour to match 1-hour candle
-        rounded_time = funding_time - (funding_time % (60 * 60 * 1000))
-        price_params = {
-            "symbol": symbol,
-            "interval": "1h",
-            "startTime": rounded_time,
-            "limit": 1
-        }
-        price_resp = requests.get(kline_url, params=price_params)
-        price_data = price_resp.json()
-
-        # Extract mark price from the 1-hour kline
-        if isinstance(price_data, list) and price_data:
-            mark_price = float(price_data[0][1])  # Open price of the candle
-        else:
-            mark_price = None
-            print(f"Could not get price data for time {datetime.fromtimestamp(funding_time/1000, tz=timezone.utc)} UTC")
-
-        # Store record with timestamp, funding rate, and mark price
-        timestamp_utc = datetime.fromtimestamp(funding_time / 1000, tz=timezone.utc)
-        all_data.append({
-            "timestamp": timestamp_utc,
-            "fundingRate": funding_rate,
-            "price": mark_price
-        })
-        print(f"Added record for {timestamp_utc} UTC: rate={funding_rate}, price={mark_price}")
-
-        time.sleep(0.05)  # Avoid hitting API rate limits
-
-    # Move start time forward to the next funding time
-    start_time = int(data[-1]['fundingTime']) + 1
-    time.sleep(0.05)
+funding_rows = binance_funding_history(symbol, start_time, max_end_time, base_url=base_url)
+print(f"API response: Got {len(funding_rows)} records")
+for funding_time, funding_rate in funding_rows:
+    all_data.append({"fundingTime": funding_time, "fundingRate": funding_rate})
 
 # Check for specific expected funding rates if normal fetch didn't get new data
 if len(all_data) == 0:
@@ -158,15 +118,10 @@ if len(all_data) == 0:
     # Check each expected funding time individually
     for funding_time in expected_funding_times:
         funding_time_ms = int(funding_time.timestamp() * 1000)
-        params = {
-            "symbol": symbol,
-            "startTime": funding_time_ms,
-            "endTime": funding_time_ms + 1000,  # Add 1 second to be safe
-            "limit": 1
-        }
-        print(f"Checking specific funding time {funding_time} UTC with params: {params}")
-        resp = requests.get(funding_url, params=params)
-        data = resp.json()
+        # Add 1 second to the end time to be safe
+        request = binance_funding_request(symbol, funding_time_ms, funding_time_ms + 1000, limit=1)
+        print(f"Checking specific funding time {funding_time} UTC with params: {request[1]}")
+        data = fetch(base_url, request)
         print(f"Response for {funding_time} UTC: Got {len(data)} records")
         
         if data:
@@ -175,84 +130,52 @@ if len(all_data) == 0:
                 funding_rate = float(entry['fundingRate'])
                 
                 # Check if we already have this funding time
-                if df_existing is not None and not df_existing.empty:
-                    timestamp_check = datetime.fromtimestamp(funding_time / 1000)
-                    if any(df_existing['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S') == timestamp_check.strftime('%Y-%m-%d %H:%M:%S')):
-                        print(f"Skipping already existing funding time: {timestamp_check}")
-                        continue
+                if funding_time // 1000 in known_funding_times:
+                    print(f"Skipping already existing funding time: {datetime.fromtimestamp(funding_time / 1000, tz=timezone.utc)} UTC")
+                    continue
                 
-                # Get the price data for this funding time
-                rounded_time = funding_time - (funding_time % (60 * 60 * 1000))
-                price_params = {
-                    "symbol": symbol,
-                    "interval": "1h",
-                    "startTime": rounded_time,
-                    "limit": 1
-                }
-                price_resp = requests.get(kline_url, params=price_params)
-                price_data = price_resp.json()
-                
-                if isinstance(price_data, list) and price_data:
-                    mark_price = float(price_data[0][1])  # Open price of the candle
-                else:
-                    mark_price = None
-                    print(f"Could not get price data for time {datetime.fromtimestamp(funding_time/1000, tz=timezone.utc)} UTC")
-                
-                # Store record
-                timestamp_utc = datetime.fromtimestamp(funding_time / 1000, tz=timezone.utc)
-                all_data.append({
-                    "timestamp": timestamp_utc,
-                    "fundingRate": funding_rate,
-                    "price": mark_price
-                })
-                print(f"Added specific record for {timestamp_utc} UTC: rate={funding_rate}, price={mark_price}")
-        
-        time.sleep(0.1)  # Avoid API rate limits
+                all_data.append({"fundingTime": funding_time, "fundingRate": funding_rate})
+                print(f"Added specific record for {datetime.fromtimestamp(funding_time / 1000, tz=timezone.utc)} UTC: rate={funding_rate}")
+
+
+# Only rows after the last stored funding, once each and in time order, so they can be appended
+last_known = max(known_funding_times) if known_funding_times else None
+new_rows = {}
+for record in all_data:
+    seconds = record["fundingTime"] // 1000
+    if (last_known is None or seconds > last_known) and seconds not in known_funding_times:
+        new_rows.setdefault(seconds, record)
+all_data = [new_rows[seconds] for seconds in sorted(new_rows)]
+
+# Mark prices for every new funding time from one range of 1h candles (open price of the candle)
+if all_data:
+    funding_times = [record["fundingTime"] for record in all_data]
+    prices = binance_mark_price_klines(symbol, *kline_range(funding_times), base_url=base_url)
+    for i, mark_price in enumerate(attach_mark_prices(funding_times, prices)):
+        timestamp_utc = datetime.fromtimestamp(funding_times[i] / 1000, tz=timezone.utc)
+        all_data[i] = {
+            "timestamp": timestamp_utc,
+            "fundingRate": all_data[i]["fundingRate"],
+            "price": mark_price
+        }
+        if mark_price is None:
+            print(f"Could not get price data for time {timestamp_utc} UTC")
+        print(f"Added record for {timestamp_utc} UTC: rate={all_data[i]['fundingRate']}, price={mark_price}")
 
-# Convert all new records to DataFrame
+# Convert all new records to DataFrame (naive UTC timestamps, like the rows already stored)
 df_new = pd.DataFrame(all_data)
 print(f"Total new records fetched: {len(df_new)}")
+print_latency_report()
 
-# Combine with existing data and drop duplicates
-if not df_existing.empty and not df_new.empty:
-    # Ensure timestamps are compatible by converting to naive datetime if needed
-    if df_new["timestamp"].iloc[0].tzinfo is not None:
-        df_new["timestamp"] = df_new["timestamp"].dt.tz_localize(None)
-    
-    df_merged = pd.concat([df_existing, df_new]).drop_duplicates("timestamp").sort_values("timestamp")
-    print(f"Merged {len(df_existing)} existing and {len(df_new)} new records, final count: {len(df_merged)}")
-elif not df_new.empty:
-    # For new data only, convert timezone-aware timestamps to naive
-    df_new["timestamp"] = df_new["timestamp"].dt.tz_localize(None)
-    df_merged = df_new
-    print(f"No existing records, only new {len(df_new)} records")
-else:
-    # No new data
-    df_merged = df_existing
+if df_new.empty:
     print("No new records to add")
-
-# First try to write to a temporary file
-try:
-    # Save updated DataFrame to temporary CSV
-    os.makedirs(os.path.dirname(temp_csv_path), exist_ok=True)
-    df_merged.to_csv(temp_csv_path, index=False, decimal=',')
-    print(f"✅ Wrote to temporary file: {temp_csv_path}")
-    
-    # Now try to replace the original file with the temp file
+else:
+    df_new["timestamp"] = df_new["timestamp"].dt.tz_localize(None)
     try:
-        # First try renaming (atomic operation)
-        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-        shutil.move(temp_csv_path, csv_path)
+        # One append of whole lines at the end of the file; nothing already stored is rewritten
+        append_funding_rows(csv_path, df_new, decimal=',')
         print(f"✅ Successfully updated: {csv_path} with {len(df_new)} new records")
+        warn_if_unclean(csv_path)
     except Exception as e:
-        # If renaming fails, try to copy instead
-        print(f"Warning: Could not move temp file: {e}")
-        try:
-            shutil.copyfile(temp_csv_path, csv_path)
-            print(f"✅ Successfully copied to: {csv_path} with {len(df_new)} new records")
-        except Exception as e2:
-            print(f"❌ Error: Could not copy temp file: {e2}")
-            print(f"The updated data is still available in the temporary file: {temp_csv_path}")
-except Exception as e:
-    print(f"❌ Error while saving CSV: {e}")
-    print("Please check if any other process is using the file.")
+        print(f"❌ Error while saving CSV: {e}")
+        print("Please check if any other process is using the file.")
@@ -1,6 +1,10 @@
-import pandas as pd
 import os
 import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Storage"))
+from columnar import save_frame
+import sqlite_store
+
 # === Setup dynamic paths based on script location ===
 script_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.abspath(os.path.join(script_dir, "..", ".."))
@@ -8,30 +12,32 @@ root_dir = os.path.abspath(os.path.join(script_dir, "..", ".."))
 # === Paths to input data files ===
 backtest_path = os.path.join(root_dir, "src", "BackTesting", "data", "backtest_info_entry_only_avg_24.csv")
 live_path = os.path.join(root_dir, "data", "binance_btcusdt_funding_live.csv")
-output_path = os.path.join(root_dir, "data", "DataBase.csv")
+database_path = os.path.join(root_dir, "data", "DataBase.sqlite")
+output_path = os.path.join(root_dir, "data", "DataBase.csv")  # Deprecated: imported into the store once
+symbol = "BTCUSDT"
+export_csv = False  # Also rewrite DataBase.csv from the store (for tools that still read the CSV)
 
-# === Load the backtest dataset ===
-if os.path.exists(backtest_path):
-    df_backtest = pd.read_csv(backtest_path, parse_dates=["timestamp"], decimal=',')
-    df_backtest["source"] = "backtest"  # Label the source
-else:
+if not os.path.exists(backtest_path):
     raise FileNotFoundError("Backtest CSV not found")
 
-# === Load the live results dataset ===
-if os.path.exists(live_path):
-    df_live = pd.read_csv(live_path, parse_dates=["timestamp"], decimal=',').drop_duplicates()
-    df_live["source"] = "live"  # Label the source
-else:
-    # If no live data exists yet, initialize an empty DataFrame with same structure
-    df_live = pd.DataFrame(columns=df_backtest.columns)
-
-# === Combine both datasets into a single DataFrame ===
-combined_df = pd.concat([df_backtest, df_live], ignore_index=True)
-
-# === Drop duplicate records based on timestamp and source, and sort chronologically ===
-combined_df = combined_df.drop_duplicates(subset=["timestamp", "source"]).sort_values("timestamp")
+# === Upsert only what changed into the SQLite store ===
+# Unchanged files are skipped, appended ones parsed from where the last merge stopped, and
+# (timestamp, source, symbol) is unique, so reruns never duplicate rows
+con = sqlite_store.connect(database_path)
+try:
+    new_backtest = sqlite_store.import_csv(con, backtest_path, "backtest", symbol, decimal=',')
+    new_live = sqlite_store.import_csv(con, live_path, "live", symbol, decimal=',')
+    # First merge into a new store: carry over the history of the old DataBase.csv
+    legacy = sqlite_store.import_legacy_csv(con, output_path, symbol)
+    if legacy:
+        print(f"Imported {legacy} rows from {output_path} that the current inputs no longer hold.")
+    total = sqlite_store.count_rows(con)
+    print(f"✅ Merged {new_backtest} backtest and {new_live} live new rows into {database_path} ({total} total rows).")
 
-# === Save the merged dataset to output CSV ===
-os.makedirs(os.path.dirname(output_path), exist_ok=True)
-combined_df.to_csv(output_path, index=False, decimal=',')
-print(f"✅ Merged dataset saved to {output_path} with {len(combined_df)} total rows.")
+    # === Optional CSV export of the merged dataset ===
+    if export_csv:
+        combined_df = sqlite_store.query(con).drop(columns=["symbol"])
+        save_frame(combined_df, output_path)
+        print(f"Merged dataset exported to {output_path}")
+finally:
+    con.close()
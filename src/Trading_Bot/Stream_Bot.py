@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Exchange"))
+from funding_stream import FundingStream, WallClock, BINANCE_FSTREAM, binance_mark_price_messages, replay_feed_from_csv
+from funding_files import tail_lines, repair_tail, append_funding_rows
+import Bot
+
+# Event-driven alternative to Bot_Launcher.py: instead of fetching settled rates on the hourly
+# scheduler tick, follow the predicted funding stream and run the bot's decision as soon as a
+# funding time passes. Each settlement (the last predicted rate and the mark price at that
+# moment) is appended to its own stream CSV and handed to Bot.run_bot with the previous 2
+# fundings. The live funding CSV stays Daily_Fund_Fetcher's: it holds only the rates Binance
+# settled, which can differ from the last prediction and would be skipped if already present.
+
+# === CONFIGURATION ===
+symbol = "BTCUSDT"
+stream_url = os.environ.get("BINANCE_FSTREAM_URL", BINANCE_FSTREAM)
+history_rows = 3  # Bot's moving-average window
+stream_path = os.path.join(os.path.dirname(Bot.live_data_path), "binance_btcusdt_funding_stream.csv")
+
+
+def load_recent_fundings(paths, rows=history_rows):
+    # Last non-zero funding rows across the CSVs, read from their tails only; a funding found in
+    # several keeps the row of the first path (the settled rate over the streamed prediction).
+    # Settled stamps run a few ms late, so fundings are matched on the minute
+    lines = []
+    for path in paths:
+        if os.path.exists(path):
+            repair_tail(path)
+            lines += [line for line in tail_lines(path, 32) if line and not line.startswith("timestamp")]
+    if not lines:
+        return []
+    df = pd.read_csv(io.StringIO("timestamp,fundingRate,price\n" + "\n".join(lines)), parse_dates=["timestamp"], decimal=',')
+    df = df[~df["timestamp"].dt.round("min").duplicated()]
+    df = df[df["fundingRate"] != 0].sort_values("timestamp")
+    return df.tail(rows).to_dict("records")
+
+
+def make_handler(history, stream_path, results_path, clock):
+    def on_settlement(event):
+        received = time.perf_counter()
+        timestamp = datetime.fromtimestamp(event.funding_time / 1000, tz=timezone.utc).replace(tzinfo=None)
+        # Lag in real time (the replay clock runs faster)
+        lag_ms = -1000 * clock.seconds_until(event.funding_time)
+        print(f"\n⏱️ Funding settled at {timestamp} UTC: rate={event.funding_rate}, price={event.mark_price} "
+              f"(pushed {lag_ms:.1f} ms after settlement)")
+        if history and history[-1]["timestamp"] >= timestamp:
+            print("Already recorded, skipping")
+            return
+        row = {"timestamp": timestamp, "fundingRate": event.funding_rate, "price": event.mark_price}
+        if stream_path is not None:
+            append_funding_rows(stream_path, pd.DataFrame([row]), decimal=',')
+        if event.funding_rate == 0:
+            return
+        history.append(row)
+        Bot.run_bot(pd.DataFrame(list(history)), results_path)
+        print(f"Decision made {1000 * (time.perf_counter() - received):.0f} ms after the event")
+    return on_settlement
+
+
+async def main(args):
+    if args.replay:
+        # Offline: stored fundings on an accelerated clock; no stream CSV is written
+        feed = replay_feed_from_csv(args.replay, symbol, speed=args.speed)
+        if args.last:
+            start = feed.times[max(len(feed.times) - args.last - history_rows, 0)]
+            feed = replay_feed_from_csv(args.replay, symbol, speed=args.speed, start_ms=start)
+        history = deque(maxlen=history_rows)
+        results_path = args.results or os.path.join(tempfile.gettempdir(), "stream_replay_results.csv")
+        stream = FundingStream(symbol, make_handler(history, None, results_path, feed), clock=feed)
+        messages = feed
+    else:
+        history = deque(load_recent_fundings([Bot.live_data_path, stream_path]), maxlen=history_rows)
+        results_path = args.results or Bot.results_path
+        clock = WallClock()
+        stream = FundingStream(symbol, make_handler(history, stream_path, results_path, clock), clock)
+        messages = binance_mark_price_messages(symbol, stream_url)
+    print(f"📡 Following {symbol} predicted funding ({'replay of ' + args.replay if args.replay else stream_url})")
+    print(f"Results: {results_path}")
+    await stream.run(messages)
+    print(f"Stream ended after {stream.updates} updates")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the bot on each funding settlement from the live stream")
+    parser.add_argument("--replay", help="Replay a funding CSV (timestamp, fundingRate, price; naive UTC) instead of the websocket")
+    parser.add_argument("--speed", type=float, default=28800.0, help="Replay clock speed (28800 = one 8h funding per second)")
+    parser.add_argument("--last", type=int, default=0, help="Replay only the last N fundings")
+    parser.add_argument("--results", help="Results CSV (default: live_bot_results.csv, or a temp file when replaying)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass